@@ -0,0 +1,336 @@
+"""
+Массовый импорт пользователей из CSV или NDJSON.
+
+Каждая запись содержит full_name, email, phone и либо готовый bcrypt-хэш
+в hashed_password (переносится как есть), либо пароль в открытом виде в password
+(хэшируется в общем пуле процессов). Чтение и проверка файла выполняются в пуле потоков,
+чтобы не блокировать цикл событий сервера. Записи загружаются во временную таблицу через COPY,
+дубликаты email и телефона отсеиваются в базе, а пользователи добавляются одним
+INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+
+Запуск из командной строки:
+    python -m app.auth.importer users.csv
+    python -m app.auth.importer users.ndjson --format ndjson --workers 8
+"""
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from sqlalchemy import Column, Integer, MetaData, String, Table, case, exists, false, func, or_, select, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import User
+from app.core.security import hash_password
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_BATCH_SIZE = 10000  # Количество записей, загружаемых одним COPY
+MAX_REPORTED_ERRORS = 1000  # Сколько отклонённых записей перечислять в отчёте поимённо
+
+BCRYPT_HASH_PATTERN = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
+PHONE_PATTERN = re.compile(r"^\+7\d{10}$")
+email_adapter = TypeAdapter(EmailStr)
+
+# Временная таблица живёт до конца транзакции импорта
+staging_metadata = MetaData()
+user_import = Table(
+    "user_import",
+    staging_metadata,
+    Column("line", Integer),
+    Column("full_name", String),
+    Column("email", String),
+    Column("phone", String),
+    Column("hashed_password", String),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+STAGING_COLUMNS = [column.name for column in user_import.columns]
+
+REJECTION_REASONS = {
+    "duplicate": "Email или телефон повторяется в файле",
+    "exists": "Пользователь с таким email или телефоном уже существует",
+}
+
+# Общий пул процессов для хэширования паролей, создаётся при первом импорте
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    rejected: int = 0
+    errors: List[dict] = field(default_factory=list)
+
+    def reject(self, line: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "reason": reason})
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Построчно читает записи из CSV (с заголовком) или NDJSON.\n
+    Аргументы:\n
+        \t stream (TextIO): Текстовый поток с данными.
+        \t fmt (str): Формат данных: csv или ndjson.
+    Возвращает:\n
+        \t Iterator[Tuple[int, dict]]: Номер строки в файле и запись.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line, raw in enumerate(stream, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError:
+            record = None
+        yield line, record
+
+
+def text_field(record: dict, name: str) -> str:
+    """
+    Возвращает строковое поле записи или пустую строку, если поле не заполнено.\n
+    Исключения:\n
+        \t ValueError: Если в NDJSON поле передано не строкой (числом, списком и т. п.).
+    """
+    value = record.get(name)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"Поле {name} должно быть строкой")
+    return value
+
+
+def validate_record(record: dict) -> Tuple[str, str, str, str, str]:
+    """
+    Проверяет и нормализует запись импорта.\n
+    Аргументы:\n
+        \t record (dict): Запись из файла (None, если строку не удалось разобрать).
+    Исключения:\n
+        \t ValueError: Если запись некорректна или не является объектом.
+    Возвращает:\n
+        \t Tuple[str, str, str, str, str]: ФИО, email, телефон, bcrypt-хэш и пароль в открытом виде
+        (заполнено ровно одно из двух последних полей).
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Строка не является JSON-объектом")
+    full_name = text_field(record, "full_name").strip()
+    email = text_field(record, "email").strip()
+    phone = text_field(record, "phone").strip()
+    hashed_password = text_field(record, "hashed_password").strip()
+    password = text_field(record, "password")
+
+    if not full_name:
+        raise ValueError("Не указано ФИО")
+    try:
+        email = email_adapter.validate_python(email)
+    except ValidationError:
+        raise ValueError("Некорректный email")
+    if not PHONE_PATTERN.match(phone):
+        raise ValueError("Номер телефона должен начинаться с +7 и содержать 10 цифр")
+    if hashed_password:
+        if not BCRYPT_HASH_PATTERN.match(hashed_password):
+            raise ValueError("hashed_password не является bcrypt-хэшем")
+        password = ""
+    elif not password:
+        raise ValueError("Не указан ни пароль, ни его хэш")
+    return full_name, email, phone, hashed_password, password
+
+
+def validated_batches(stream: TextIO, fmt: str, report: ImportReport) -> Iterator[List[tuple]]:
+    """
+    Читает и проверяет записи, отдавая их пачками по IMPORT_BATCH_SIZE.\n
+    Некорректные записи сразу попадают в отчёт как отклонённые.\n
+    Аргументы:\n
+        \t stream (TextIO): Текстовый поток с данными.
+        \t fmt (str): Формат данных: csv или ndjson.
+        \t report (ImportReport): Отчёт импорта.
+    Возвращает:\n
+        \t Iterator[List[tuple]]: Пачки записей (номер строки и поля из validate_record).
+    """
+    batch = []
+    for line, record in read_records(stream, fmt):
+        try:
+            batch.append((line,) + validate_record(record))
+        except ValueError as error:
+            report.reject(line, str(error))
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def apply_rejections(report: ImportReport, rejected: Iterable[Tuple[int, str]], staged: int) -> None:
+    """
+    Дополняет отчёт записями, отклонёнными базой, и подсчитывает добавленных пользователей.\n
+    Аргументы:\n
+        \t report (ImportReport): Отчёт импорта.
+        \t rejected (Iterable[Tuple[int, str]]): Номер строки и причина: duplicate или exists.
+        \t staged (int): Количество записей, загруженных во временную таблицу.
+    """
+    rejected_in_db = 0
+    for line, reason in rejected:
+        report.reject(line, REJECTION_REASONS[reason])
+        rejected_in_db += 1
+    report.inserted = staged - rejected_in_db
+    report.errors.sort(key=lambda error: error["line"])
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    """
+    Возвращает общий пул процессов для хэширования паролей, создавая его при первом вызове.\n
+    Процессы запускаются через spawn: fork работающего сервера с потоками и открытыми соединениями небезопасен.
+    """
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    """Останавливает общий пул процессов при завершении приложения."""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Хэширует пачку паролей; выполняется в процессе пула."""
+    return [hash_password(password) for password in passwords]
+
+
+async def hash_in_pool(pool: Executor, passwords: List[str], chunks: int) -> List[str]:
+    """Распределяет хэширование паролей по процессам пула, сохраняя порядок."""
+    if not passwords:
+        return []
+    size = max(1, -(-len(passwords) // chunks))
+    loop = asyncio.get_running_loop()
+    parts = await asyncio.gather(*(
+        loop.run_in_executor(pool, hash_passwords, passwords[start:start + size])
+        for start in range(0, len(passwords), size)
+    ))
+    return [hashed for part in parts for hashed in part]
+
+
+async def copy_batch(db: AsyncSession, batch: List[tuple], pool: Executor, workers: int) -> None:
+    """Хэширует пароли пачки и загружает её во временную таблицу через COPY."""
+    plain = [index for index, record in enumerate(batch) if not record[4]]
+    hashed = await hash_in_pool(pool, [batch[index][5] for index in plain], workers)
+    for index, value in zip(plain, hashed):
+        batch[index] = batch[index][:4] + (value,)
+
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        user_import.name,
+        records=[record[:5] for record in batch],
+        columns=STAGING_COLUMNS,
+    )
+
+
+async def import_users(
+        db: AsyncSession,
+        stream: TextIO,
+        fmt: str = "csv",
+        pool: Executor = None,
+        workers: int = None
+) -> ImportReport:
+    """
+    Импортирует пользователей из потока одной транзакцией.\n
+    Уже существующие в базе email и телефоны, а также их повторы внутри файла
+    (побеждает первая по порядку строка) попадают в отчёт как отклонённые.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t stream (TextIO): Текстовый поток с данными.
+        \t fmt (str): Формат данных: csv или ndjson.
+        \t pool (Executor, optional): Пул процессов для хэширования паролей. По умолчанию общий пул get_hash_pool.
+        \t workers (int, optional): Количество процессов пула. По умолчанию равно числу CPU.
+    Возвращает:\n
+        \t ImportReport: Количество добавленных и отклонённых записей и причины отклонения.
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = pool or get_hash_pool()
+
+    report = ImportReport()
+    connection = await db.connection()
+    await connection.run_sync(user_import.create)
+
+    staged = 0
+    batches = validated_batches(stream, fmt, report)
+    while True:
+        # Чтение файла и проверка записей блокируют, поэтому выполняются в пуле потоков
+        batch = await run_in_threadpool(next, batches, None)
+        if batch is None:
+            break
+        await copy_batch(db, batch, pool, workers)
+        staged += len(batch)
+
+    ranked = select(
+        user_import,
+        func.row_number().over(partition_by=user_import.c.email, order_by=user_import.c.line).label("email_rank"),
+        func.row_number().over(partition_by=user_import.c.phone, order_by=user_import.c.line).label("phone_rank"),
+    ).cte("ranked")
+    duplicate = or_(ranked.c.email_rank > 1, ranked.c.phone_rank > 1)
+    inserted = (
+        insert(User)
+        .from_select(
+            ["full_name", "email", "phone", "hashed_password", "is_active", "is_admin"],
+            select(
+                ranked.c.full_name, ranked.c.email, ranked.c.phone, ranked.c.hashed_password, true(), false()
+            ).where(~duplicate)
+        )
+        .on_conflict_do_nothing()
+        .returning(User.email)
+        .cte("inserted")
+    )
+    rejected = (
+        select(ranked.c.line, case((duplicate, "duplicate"), else_="exists").label("reason"))
+        .where(or_(duplicate, ~exists().where(inserted.c.email == ranked.c.email)))
+        .order_by(ranked.c.line)
+    )
+    result = await db.execute(rejected)
+    apply_rejections(report, result.all(), staged)
+    await db.commit()
+    return report
+
+
+async def main(path: str, fmt: str, workers: int) -> None:
+    from app.db.session import SessionLocal
+
+    workers = workers or os.cpu_count() or 1
+    with open(path, encoding="utf-8", newline="") as stream, ProcessPoolExecutor(max_workers=workers) as pool:
+        async with SessionLocal() as db:
+            report = await import_users(db, stream, fmt, pool, workers)
+    print(json.dumps(
+        {"inserted": report.inserted, "rejected": report.rejected, "errors": report.errors},
+        ensure_ascii=False,
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Путь к файлу CSV или NDJSON")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None, help="По умолчанию определяется по расширению")
+    parser.add_argument("--workers", type=int, default=None, help="Количество процессов для хэширования паролей")
+    args = parser.parse_args()
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    asyncio.run(main(args.path, fmt, args.workers))
@@ -1,26 +1,48 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, UploadFile, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
+import io
 from datetime import timedelta
+from typing import List, Optional
 
+from sqlalchemy import any_, literal, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.auth.schemas import UserCreate, Token, UserOut, UserRegister
-from app.auth.models import User
+from app.auth.importer import IMPORT_FORMATS, import_users
+from app.auth.schemas import (
+    UserCreate,
+    Token,
+    RefreshRequest,
+    TokensRevoke,
+    UserRegister,
+    UserShort,
+    UserPage,
+    UserImportReport
+)
+from app.auth.models import User, RefreshToken
+from app.auth.tokens import issue_refresh_token, rotate_refresh_token, revoke_refresh_tokens
 from app.core.security import (
     authenticate_user,
     create_access_token,
     hash_password,
     get_current_active_user,
+    get_current_admin_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from app.core.config import settings
+from app.core.fields import parse_fields, columns_for, fields_json, json_response
+from app.core.singleflight import SingleFlight
 from app.db.session import get_db
 
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Одновременные запросы одного и того же пользователя выполняют один запрос к базе
+users_flight = SingleFlight(settings.SINGLE_FLIGHT_TIMEOUT_SECONDS)
+
 
 @router.post("/register", response_model=UserRegister)
 async def register_user(
@@ -66,14 +88,14 @@ async def login_for_access_token(
 ) -> dict:
     """
     Обработчик POST-запроса на получение токена доступа.\n
-    Аутентифицирует пользователя по email и паролю, а затем выдаёт токен доступа.\n
+    Аутентифицирует пользователя по email и паролю, а затем выдаёт токен доступа и refresh-токен.\n
     Аргументы:\n
         \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
         \t form_data (OAuth2PasswordRequestForm): Форма аутентификации.
     Исключения:\n
         \t HTTPException: Если аутентификация не удалась.
     Возвращает:\n
-        \t dict: Токен доступа и тип токена.
+        \t dict: Токен доступа, тип токена и refresh-токен.
     """
     user = await authenticate_user(db, email=form_data.username, password=form_data.password)
     if not user:
@@ -84,7 +106,39 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(data={"sub": str(user.id)}, expires_delta=access_token_expires)
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+        refresh_data: RefreshRequest,
+        db: AsyncSession = Depends(get_db)
+) -> dict:
+    """
+    Обработчик POST-запроса на обновление токена доступа по refresh-токену.\n
+    Не проверяет пароль: токен ищется по индексу, погашается и заменяется новым (ротация).
+    Повторное использование погашенного refresh-токена отзывает все токены этой сессии.\n
+    Аргументы:\n
+        \t refresh_data (RefreshRequest): Refresh-токен, полученный при входе или предыдущем обновлении.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+    Исключения:\n
+        \t HTTPException: Если refresh-токен недействителен, просрочен, отозван или уже использован.
+    Возвращает:\n
+        \t dict: Новый токен доступа, тип токена и новый refresh-токен.
+    """
+    rotated = await rotate_refresh_token(db, refresh_data.refresh_token)
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Недействительный refresh-токен",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user_id, refresh_token = rotated
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(data={"sub": str(user_id)}, expires_delta=access_token_expires)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
 
 # @router.get("/users/me", response_model=User)
@@ -98,33 +152,162 @@ async def login_for_access_token(
 #     """
 #     return current_user
 
-@router.get("/users/{user_id}", response_model=UserOut)
+# Максимальное количество ID в одном пакетном запросе пользователей
+MAX_USER_IDS = 1000
+
+
+@router.get("/users", response_model=UserPage)
+async def get_users(
+        ids: Optional[List[int]] = Query(None, description="ID пользователей: ?ids=1&ids=2"),
+        is_active: Optional[bool] = Query(None),
+        is_admin: Optional[bool] = Query(None),
+        after_id: Optional[int] = Query(None, description="Курсор: ID последнего пользователя предыдущей страницы"),
+        limit: int = Query(50, ge=1, le=500),
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+) -> dict:
+    """
+    Возвращает пользователей списком для административных инструментов.\n
+    Если переданы `ids`, пользователи выбираются одним запросом WHERE id = ANY(...) без постраничной разбивки.
+    Иначе возвращается страница пользователей, упорядоченных по ID (keyset-пагинация по курсору `after_id`).\n
+    Доступно только администраторам.\n
+    Аргументы:\n
+        \t ids (Optional[List[int]]): ID пользователей для пакетной выборки.
+        \t is_active (Optional[bool]): Фильтр по активности.
+        \t is_admin (Optional[bool]): Фильтр по признаку администратора.
+        \t after_id (Optional[int]): ID последнего пользователя предыдущей страницы.
+        \t limit (int): Размер страницы.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
+    Исключения:\n
+        \t HTTPException: Если передано больше MAX_USER_IDS идентификаторов.
+    Возвращает:\n
+        \t dict: Пользователи и курсор следующей страницы.
+    """
+    stmt = select(*columns_for(User, tuple(UserShort.model_fields))).order_by(User.id)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    if is_admin is not None:
+        stmt = stmt.where(User.is_admin == is_admin)
+
+    if ids:
+        if len(ids) > MAX_USER_IDS:
+            raise HTTPException(status_code=400, detail=f"Можно запросить не более {MAX_USER_IDS} пользователей")
+        stmt = stmt.where(User.id == any_(literal(ids, ARRAY(Integer))))
+        result = await db.execute(stmt)
+        return {"items": result.mappings().all(), "next_after_id": None}
+
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id)
+    # Берём на одну строку больше, чтобы узнать, есть ли следующая страница, без COUNT(*)
+    result = await db.execute(stmt.limit(limit + 1))
+    users = result.mappings().all()
+    next_after_id = users[limit - 1]["id"] if len(users) > limit else None
+    return {"items": users[:limit], "next_after_id": next_after_id}
+
+
+@router.post("/users/import", response_model=UserImportReport)
+async def import_users_file(
+        file: UploadFile,
+        format: Optional[str] = Query(None, description="csv или ndjson; по умолчанию определяется по имени файла"),
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+) -> UserImportReport:
+    """
+    Массово импортирует пользователей из файла CSV или NDJSON.\n
+    Записи с полем hashed_password (bcrypt) переносятся без повторного хэширования,
+    пароли в поле password хэшируются в общем пуле процессов.
+    Чтение и проверка файла выполняются в пуле потоков и не блокируют другие запросы.
+    Для миграции миллионов пользователей используйте командную строку: python -m app.auth.importer.\n
+    Доступно только администраторам.\n
+    Аргументы:\n
+        \t file (UploadFile): Файл с пользователями.
+        \t format (Optional[str]): Формат файла: csv или ndjson.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
+    Исключения:\n
+        \t HTTPException: Если формат файла не поддерживается.
+        \t HTTPException: Если файл не в кодировке UTF-8.
+    Возвращает:\n
+        \t UserImportReport: Количество добавленных и отклонённых записей и причины отклонения.
+    """
+    fmt = format or ("ndjson" if (file.filename or "").endswith((".ndjson", ".jsonl")) else "csv")
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Поддерживаются форматы: {', '.join(IMPORT_FORMATS)}")
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        report = await import_users(db, stream, fmt)
+    except UnicodeDecodeError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Файл должен быть в кодировке UTF-8")
+    return UserImportReport.model_validate(report)
+
+
+@router.post("/users/{user_id}/revoke-tokens", response_model=TokensRevoke)
+async def revoke_user_tokens(
+        user_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_active_user)
+) -> dict:
+    """
+    Отзывает все refresh-токены пользователя (выход со всех устройств).\n
+    Уже выданные токены доступа действуют до истечения их срока.
+    Если пользователь не администратор, то может отозвать только свои токены.\n
+    Аргументы:\n
+        \t user_id (int): ID пользователя.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь, полученный из токена доступа.
+    Исключения:\n
+        \t HTTPException: Если пользователь не администратор и пытается отозвать чужие токены.
+    Возвращает:\n
+        \t dict: Сообщение об успешном отзыве токенов.
+    """
+    if user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Нет доступа к этим данным")
+
+    await revoke_refresh_tokens(db, RefreshToken.user_id == user_id)
+    await db.commit()
+    return {"message": "Сессии пользователя завершены"}
+
+
+@router.get("/users/{user_id}", response_model=UserShort)
 async def get_user_by_id(
         user_id: int,
+        fields: Optional[str] = Query(None, description="Поля ответа через запятую, например id,full_name"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_active_user)
-) -> UserOut:
+) -> Response:
     """
     Возвращает информацию о пользователе по его ID.\n
     Если пользователь не администратор, то может получить информацию только о себе.\n
+    Из базы читаются только запрошенные в `fields` колонки.
+    Одновременные запросы одного пользователя с одинаковым набором полей получают результат одного обращения к базе.\n
     Аргументы:\n
         \t user_id (int): ID пользователя, информацию о котором нужно получить.
+        \t fields (Optional[str]): Поля ответа через запятую. По умолчанию возвращаются все поля UserShort.
         \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
         \t current_user (User): Текущий авторизованный пользователь, полученный из токена доступа.
     Исключения:\n
         \t HTTPException: Если пользователь не администратор и пытается получить информацию о другом пользователе.
+        \t HTTPException: Если запрошено недопустимое поле.
         \t HTTPException: Если пользователь с указанным ID не найден.
     Возвращает:\n
-        \t UserOut: Информация о пользователе.
+        \t UserShort: Информация о пользователе.
     """
     if user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Нет доступа к этим данным")
 
-    stmt = select(User).where(User.id == user_id)
-    result = await db.execute(stmt)
-    user = result.scalars().first()
+    names = parse_fields(fields, UserShort)
 
-    if not user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    async def load_user() -> bytes:
+        stmt = select(*columns_for(User, names)).where(User.id == user_id)
+        result = await db.execute(stmt)
+        user = result.mappings().first()
+
+        if not user:
+            raise HTTPException(status_code=404, detail="Пользователь не найден")
+
+        return fields_json(UserShort, names, user, many=False)
 
-    return user
+    return json_response(await users_flight.do((user_id, names), load_user))
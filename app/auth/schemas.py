@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr, validator
+from typing import List, Optional
 import re
 
 
@@ -86,9 +87,53 @@ class UserOut(UserCreate):
         from_attributes = True
 
 
+class UserShort(BaseModel):
+    id: int
+    full_name: str
+    email: str
+    phone: str
+    is_active: Optional[bool]
+    is_admin: Optional[bool]
+
+    class Config:
+        from_attributes = True
+
+
+class UserPage(BaseModel):
+    items: List[UserShort]
+    next_after_id: Optional[int] = None  # Курсор следующей страницы; None — страница последняя
+
+
+class UserImportError(BaseModel):
+    line: int
+    reason: str
+
+
+class UserImportReport(BaseModel):
+    inserted: int
+    rejected: int
+    errors: List[UserImportError]  # Не более MAX_REPORTED_ERRORS первых отклонённых записей
+
+    class Config:
+        from_attributes = True
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class TokensRevoke(BaseModel):
+    message: str
 
     class Config:
         from_attributes = True
+        json_schema_extra = {"example": {"message": "Сессии пользователя завершены"}}
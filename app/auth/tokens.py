@@ -0,0 +1,132 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import User, RefreshToken
+from app.core.config import settings
+
+REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
+REFRESH_TOKEN_PURGE_BATCH_SIZE = 1000
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Хэширует refresh-токен для хранения в базе.\n
+    Токен — 256 бит случайных данных, поэтому перебор невозможен и медленный bcrypt не нужен:
+    достаточно SHA-256, который позволяет искать токен по уникальному индексу.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db: AsyncSession, user_id: int, family_id: Optional[str] = None) -> str:
+    """
+    Выпускает новый непрозрачный refresh-токен и добавляет его хэш в сессию.\n
+    Транзакцию фиксирует вызывающий код.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t user_id (int): ID пользователя.
+        \t family_id (Optional[str]): Цепочка ротации. По умолчанию начинается новая (новый вход).
+    Возвращает:\n
+        \t str: Refresh-токен для передачи клиенту.
+    """
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Optional[Tuple[int, str]]:
+    """
+    Погашает refresh-токен и выпускает следующий в той же цепочке.\n
+    Проверка и погашение выполняются одним UPDATE по уникальному индексу token_hash.
+    Повторное предъявление уже погашенного токена считается кражей:
+    вся цепочка токенов отзывается.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t token (str): Refresh-токен клиента.
+    Возвращает:\n
+        \t Optional[Tuple[int, str]]: ID пользователя и новый refresh-токен
+        или None, если токен недействителен.
+    """
+    now = datetime.utcnow()
+    token_hash = hash_refresh_token(token)
+    stmt = (
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+            RefreshToken.user_id == User.id,
+            User.is_active == True
+        )
+        .values(used_at=now)
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    row = result.first()
+
+    if row is None:
+        # Медленный путь только для отказов: проверяем, не предъявлен ли токен повторно
+        stmt = select(RefreshToken.family_id).where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.used_at.is_not(None)
+        )
+        family_id = (await db.execute(stmt)).scalar_one_or_none()
+        if family_id is not None:
+            await revoke_refresh_tokens(db, RefreshToken.family_id == family_id)
+        await db.commit()
+        return None
+
+    user_id, family_id = row
+    new_token = issue_refresh_token(db, user_id, family_id)
+    await db.commit()
+    return user_id, new_token
+
+
+async def revoke_refresh_tokens(db: AsyncSession, *criteria) -> None:
+    """
+    Отзывает действующие refresh-токены, подходящие под условия.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t criteria: Условия отбора токенов, например RefreshToken.user_id == 1.
+    """
+    stmt = (
+        update(RefreshToken)
+        .where(RefreshToken.revoked_at.is_(None), *criteria)
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+async def purge_expired_refresh_tokens(db: AsyncSession) -> int:
+    """
+    Фоновая задача: удаляет просроченные refresh-токены пачками.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+    Возвращает:\n
+        \t int: Количество удалённых токенов.
+    """
+    total = 0
+    while True:
+        expired = (
+            select(RefreshToken.id)
+            .where(RefreshToken.expires_at < datetime.utcnow())
+            .limit(REFRESH_TOKEN_PURGE_BATCH_SIZE)
+            .scalar_subquery()
+        )
+        result = await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(expired)))
+        await db.commit()
+        total += result.rowcount
+        if result.rowcount < REFRESH_TOKEN_PURGE_BATCH_SIZE:
+            return total
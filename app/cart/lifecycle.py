@@ -0,0 +1,174 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import any_, delete, exists, func, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cart.models import CartItem
+from app.core.config import settings
+from app.products.models import StockReservation
+
+logger = logging.getLogger(__name__)
+
+# Секции cart_items называются cart_items_pГГГГММ и хранят позиции, созданные в этом месяце
+PARTITION_PREFIX = "cart_items_p"
+# Сколько ждать блокировку секции перед удалением, чтобы не останавливать работу корзин надолго
+PARTITION_LOCK_TIMEOUT = "5s"
+
+
+def cart_cutoff() -> datetime:
+    """Возвращает момент, раньше которого неизменявшиеся позиции корзины считаются брошенными."""
+    return datetime.utcnow() - timedelta(days=settings.CART_TTL_DAYS)
+
+
+def month_start(moment: datetime, shift: int = 0) -> datetime:
+    """Возвращает начало месяца, отстоящего от moment на shift месяцев."""
+    month = moment.year * 12 + moment.month - 1 + shift
+    return datetime(month // 12, month % 12 + 1, 1)
+
+
+def partition_expired(name: str, cutoff: datetime) -> bool:
+    """Проверяет, что все позиции помесячной секции созданы раньше момента cutoff."""
+    start = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m")
+    return month_start(start, 1) <= cutoff
+
+
+async def purge_expired_cart_items(db: AsyncSession, batch_size: int) -> int:
+    """
+    Удаляет пачку брошенных позиций корзины одним DELETE ... WHERE ctid = ANY(ARRAY(SELECT ctid ... LIMIT n)).\n
+    Поиск по физическому адресу строки (TID Scan) не требует повторного обхода индекса.
+    Условия отбора повторяются во внешнем запросе: в секционированной таблице ctid уникален
+    только внутри секции, и без них DELETE задел бы свежие строки других секций с тем же ctid.
+    Позиции с действующим резервом товара не удаляются.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t batch_size (int): Максимальное количество позиций в пачке (для секционированной таблицы — примерное).
+    Возвращает:\n
+        \t int: Количество удалённых позиций.
+    """
+    cutoff = cart_cutoff()
+    expired = CartItem.__table__.alias("expired")
+    doomed = (
+        select(literal_column("expired.ctid"))
+        .select_from(expired)
+        .where(
+            expired.c.updated_at < cutoff,
+            ~exists().where(StockReservation.cart_item_id == expired.c.id)
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = delete(CartItem).where(
+        literal_column("cart_items.ctid") == any_(func.array(doomed.scalar_subquery())),
+        CartItem.updated_at < cutoff,
+        ~exists().where(StockReservation.cart_item_id == CartItem.id)
+    )
+    result = await db.execute(stmt)
+    return result.rowcount
+
+
+async def is_cart_items_partitioned(db: AsyncSession) -> bool:
+    """
+    Проверяет по каталогу (pg_class.relkind), секционирована ли таблица cart_items в базе.\n
+    Решение о секционировании принимается при миграции, поэтому настройке CART_ITEMS_PARTITIONED
+    во время работы не доверяем: её могли изменить после применения миграции.
+    """
+    stmt = text("SELECT relkind FROM pg_class WHERE oid = to_regclass('cart_items')")
+    return (await db.execute(stmt)).scalar() == "p"
+
+
+async def list_cart_partitions(db: AsyncSession) -> List[str]:
+    """Возвращает имена помесячных секций таблицы cart_items."""
+    stmt = text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE parent.relname = 'cart_items' AND child.relname LIKE :prefix"
+    )
+    result = await db.execute(stmt, {"prefix": PARTITION_PREFIX + "%"})
+    return sorted(result.scalars().all())
+
+
+async def ensure_cart_partitions(db: AsyncSession) -> None:
+    """
+    Заранее создаёт помесячные секции cart_items на CART_PARTITIONS_AHEAD месяцев вперёд,
+    чтобы новые позиции не попадали в секцию по умолчанию.
+    Каждая секция создаётся отдельной транзакцией. Если создать секцию не удалось (например,
+    в секцию по умолчанию уже попали строки этого диапазона), ошибка логируется, а остальные
+    секции создаются как обычно.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+    """
+    now = datetime.utcnow()
+    for shift in range(settings.CART_PARTITIONS_AHEAD + 1):
+        start, end = month_start(now, shift), month_start(now, shift + 1)
+        try:
+            await db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {PARTITION_PREFIX}{start:%Y%m} PARTITION OF cart_items "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+            ))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.exception("Не удалось создать секцию %s%s", PARTITION_PREFIX, f"{start:%Y%m}")
+
+
+async def drop_expired_cart_partitions(db: AsyncSession) -> List[str]:
+    """
+    Удаляет помесячные секции cart_items, все позиции которых старше срока жизни корзины.\n
+    DROP TABLE освобождает место сразу, без построчного DELETE и последующего VACUUM.
+    Проверка свежих позиций и удаление выполняются в одной транзакции под блокировкой
+    ACCESS EXCLUSIVE, поэтому позиция, изменённая между проверкой и удалением, не пропадёт.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+    Возвращает:\n
+        \t List[str]: Имена удалённых секций.
+    """
+    cutoff = cart_cutoff()
+    dropped = []
+    for name in await list_cart_partitions(db):
+        if not partition_expired(name, cutoff):
+            continue
+        # Родительская таблица блокируется первой — в том же порядке, что и при вставке позиций
+        await db.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+        await db.execute(text(f"LOCK TABLE ONLY cart_items, {name} IN ACCESS EXCLUSIVE MODE"))
+        # Позицию могли изменить позже месяца создания — такую секцию оставляем построчной очистке
+        stmt = text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE updated_at >= :cutoff)")
+        if (await db.execute(stmt, {"cutoff": cutoff})).scalar():
+            await db.rollback()
+            continue
+        await db.execute(text(f"DROP TABLE {name}"))
+        await db.commit()
+        dropped.append(name)
+    await db.commit()
+    return dropped
+
+
+async def maintain_cart_items(db: AsyncSession) -> int:
+    """
+    Фоновая задача обслуживания корзин.\n
+    Если таблица секционирована (проверяется по каталогу базы), создаёт будущие секции и удаляет
+    целиком устаревшие. Ошибки обслуживания секций логируются и не мешают следующему шагу:
+    пачками удаляются оставшиеся брошенные позиции, каждая пачка фиксируется отдельно.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+    Возвращает:\n
+        \t int: Количество позиций, удалённых построчно.
+    """
+    try:
+        if await is_cart_items_partitioned(db):
+            await ensure_cart_partitions(db)
+            await drop_expired_cart_partitions(db)
+    except Exception:
+        await db.rollback()
+        logger.exception("Ошибка обслуживания секций cart_items")
+
+    batch_size = settings.CART_PURGE_BATCH_SIZE
+    total = 0
+    while True:
+        purged = await purge_expired_cart_items(db, batch_size)
+        await db.commit()
+        total += purged
+        if purged < batch_size:
+            return total
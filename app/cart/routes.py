@@ -1,41 +1,66 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from typing import Optional
+
 from app.auth.models import User
 from app.cart.models import CartItem
-from app.cart.schemas import CartItemCreate, CartOut, CartDelete
+from app.cart.schemas import CartItemCreate, CartItemOut, CartOut, CartDelete
 from app.products.models import Product
+from app.products.stock import take_stock, add_reservation, release_reservation
+from app.products.recommendations import record_cart_addition
+from app.pricing.engine import pricing_engine
 from app.db.session import get_db
+from app.core.fields import parse_fields, columns_for, fields_json, json_response
+from app.core.idempotency import idempotency_fingerprint, claim_idempotency_key, save_idempotent_response
 from app.core.security import get_current_active_user
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
-@router.post("/cart", response_model=CartOut)
+@router.post("/cart", response_model=CartItemOut)
 async def add_to_cart(
         item_data: CartItemCreate,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_active_user)
-) -> CartItem:
+) -> Response:
     """
-    Добавляет товар в корзину пользователя.\n
+    Добавляет товар в корзину пользователя и резервирует его на складе.\n
+    Резерв действует RESERVATION_TTL_MINUTES минут, после чего товар возвращается на склад фоновой задачей.
+    Позиция при этом остаётся в корзине, но уже без резерва: повторно товар не резервируется,
+    поэтому перед оформлением заказа наличие нужно проверить заново.\n
+    Повтор запроса с тем же заголовком Idempotency-Key возвращает сохранённый ответ, не добавляя товар ещё раз.\n
     Аргументы:\n
         \t item_data (CartItemCreate): Данные товара для добавления в корзину.
+        \t idempotency_key (Optional[str]): Ключ идемпотентности из заголовка Idempotency-Key.
         \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
         \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_active_user).
     Исключения:\n
         \t HTTPException: Если товар не найден в базе данных.
+        \t HTTPException: Если на складе недостаточно товара.
+        \t HTTPException: Если Idempotency-Key уже использован с другим запросом.
     Возвращает:\n
-        \t CartItem: Объект добавленного товара в корзину.
+        \t CartItemOut: Объект добавленного товара в корзину.
     """
-    stmt = select(Product).where(Product.id == item_data.product_id)
-    result = await db.execute(stmt)
-    product = result.scalars().first()
+    if idempotency_key:
+        fingerprint = idempotency_fingerprint("POST /cart/cart", item_data.model_dump_json())
+        replay = await claim_idempotency_key(db, current_user.id, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
 
-    if not product:
-        raise HTTPException(status_code=404, detail="Товар не найден")
+    # Списываем остаток одним условным UPDATE вместо SELECT ... FOR UPDATE и проверки в Python
+    if not await take_stock(db, item_data.product_id, item_data.quantity):
+        product = await db.get(Product, item_data.product_id)
+        if not product or not product.is_active:
+            raise HTTPException(status_code=404, detail="Товар не найден")
+        raise HTTPException(status_code=409, detail="Недостаточно товара на складе")
 
     cart_item = CartItem(
         product_id=item_data.product_id,
@@ -43,27 +68,85 @@ async def add_to_cart(
         quantity=item_data.quantity
     )
     db.add(cart_item)
+    await db.flush()  # Получаем ID позиции для привязки резерва
+    add_reservation(db, cart_item)
+
+    body = CartItemOut.model_validate(cart_item).model_dump_json().encode()
+    # После фиксации объекты сеанса устаревают, поэтому ID запоминаем заранее
+    user_id, cart_item_id = current_user.id, cart_item.id
+    if idempotency_key:
+        await save_idempotent_response(db, current_user.id, idempotency_key, 200, body)
     await db.commit()
-    await db.refresh(cart_item)
-    return cart_item
 
+    # Индекс «часто покупают вместе» обновляется отдельной транзакцией, уже без блокировки остатка товара
+    try:
+        await record_cart_addition(db, user_id, item_data.product_id, cart_item_id)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        logger.exception("Не удалось обновить индекс рекомендаций для товара %s", item_data.product_id)
+    return json_response(body)
 
-@router.get("/cart", response_model=list[CartOut])
+
+@router.get("/cart", response_model=list[CartItemOut])
 async def get_cart(
+        fields: Optional[str] = Query(None, description="Поля ответа через запятую, например id,product_id"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_active_user)
-) -> list[CartItem]:
+) -> Response:
     """
     Возвращает содержимое корзины пользователя.\n
+    Позиции, резерв которых истёк (RESERVATION_TTL_MINUTES), остаются в корзине без гарантии наличия товара.\n
+    Из базы читаются только запрошенные в `fields` колонки.\n
     Аргументы:\n
+        \t fields (Optional[str]): Поля ответа через запятую. По умолчанию возвращаются все поля CartItemOut.
         \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
         \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_active_user).
+    Исключения:\n
+        \t HTTPException: Если запрошено недопустимое поле.
     Возвращает:\n
-        \t list[CartOut]: Список объектов товаров в корзине пользователя.
+        \t list[CartItemOut]: Список объектов товаров в корзине пользователя.
     """
-    stmt = select(CartItem).where(CartItem.user_id == current_user.id)
+    names = parse_fields(fields, CartItemOut)
+    stmt = select(*columns_for(CartItem, names)).where(CartItem.user_id == current_user.id)
     result = await db.execute(stmt)
-    return result.scalars().all()
+    return json_response(fields_json(CartItemOut, names, result.mappings().all()))
+
+
+@router.get("/cart/total", response_model=CartOut)
+async def get_cart_total(
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_active_user)
+) -> dict:
+    """
+    Рассчитывает стоимость корзины пользователя с учётом действующих акций.\n
+    Позиции и цены читаются одним запросом, скидки считаются по скомпилированным правилам без обращений к базе.\n
+    Аргументы:\n
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_active_user).
+    Возвращает:\n
+        \t CartOut: Позиции корзины, сумма без скидок, скидка, итог и применённые акции.
+    """
+    stmt = (
+        select(CartItem.id, CartItem.product_id, CartItem.quantity, Product.price)
+        .join(Product, Product.id == CartItem.product_id)
+        .where(CartItem.user_id == current_user.id)
+        .order_by(CartItem.id)
+    )
+    items = (await db.execute(stmt)).mappings().all()
+
+    rules = await pricing_engine.get_rules(db)
+    price = rules.price((item["product_id"], item["price"], item["quantity"]) for item in items)
+    return {
+        "items": items,
+        "subtotal": price.subtotal,
+        "discount": price.discount,
+        "total_price": price.total,
+        "promotions": [
+            {"id": promotion_id, "name": rules.names[promotion_id], "discount": discount}
+            for promotion_id, discount in price.promotions.items()
+        ]
+    }
 
 
 @router.delete("/cart/{item_id}", response_model=CartDelete)
@@ -90,6 +173,7 @@ async def remove_from_cart(
     if not cart_item:
         raise HTTPException(status_code=404, detail="Элемент корзины не найден")
 
+    await release_reservation(db, cart_item.id)
     await db.delete(cart_item)
     await db.commit()
     return {"message": "Корзина очищена"}
@@ -1,20 +1,33 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
 
 
 class CartItemCreate(BaseModel):
     product_id: int
-    quantity: int = 1
+    quantity: int = Field(1, gt=0)
 
 
 class CartItemOut(BaseModel):
+    id: int
     product_id: int
     quantity: int
 
+    class Config:
+        from_attributes = True
+
+
+class AppliedPromotion(BaseModel):
+    id: int
+    name: str
+    discount: int
+
 
 class CartOut(BaseModel):
     items: List[CartItemOut]
+    subtotal: int  # Сумма без скидок
+    discount: int
     total_price: int
+    promotions: List[AppliedPromotion]
 
     class Config:
         from_attributes = True
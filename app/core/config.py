@@ -14,6 +14,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "supersecretkey"  # Желательно заменить на более безопасное значение
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60  # Время жизни токена в минутах
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30  # Время жизни refresh-токена в днях
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: int = 3600  # Период удаления просроченных refresh-токенов
 
     # Настройки базы данных
     POSTGRES_USER: str = os.getenv("POSTGRES_USER")
@@ -23,6 +25,32 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT")
     DATABASE_URL: str = os.getenv("DATABASE_URL")
 
+    # Объединение одинаковых одновременных запросов на чтение
+    SINGLE_FLIGHT_TIMEOUT_SECONDS: float = 5.0  # Сколько ждать результат уже выполняющегося запроса
+
+    # Идемпотентность запросов на запись (заголовок Idempotency-Key)
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24  # Сколько хранится ответ для повторов запроса
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = 3600  # Период удаления просроченных ключей
+
+    # Настройки резервирования товара
+    RESERVATION_TTL_MINUTES: int = 15  # Время жизни резерва товара в корзине
+    RESERVATION_SWEEP_INTERVAL_SECONDS: int = 30  # Период фоновой очистки просроченных резервов
+    RESERVATION_SWEEP_BATCH_SIZE: int = 500  # Количество резервов, освобождаемых за одну транзакцию
+
+    # Жизненный цикл корзины
+    CART_TTL_DAYS: int = 30  # Позиции корзины, не изменявшиеся дольше этого срока, удаляются
+    CART_PURGE_INTERVAL_SECONDS: int = 3600  # Период фоновой очистки корзин
+    CART_PURGE_BATCH_SIZE: int = 1000  # Количество позиций, удаляемых одной транзакцией
+    CART_ITEMS_PARTITIONED: bool = False  # Секционировать cart_items по месяцам при миграции 1a6f8c2e4b90
+    CART_PARTITIONS_AHEAD: int = 2  # На сколько месяцев вперёд заранее создавать секции
+
+    # Рекомендации «часто покупают вместе»
+    RECOMMENDATIONS_MAX_BASKET_SIZE: int = 100  # Корзины крупнее не учитываются (квадратичное число пар)
+    RECOMMENDATIONS_KEEP_PER_PRODUCT: int = 50  # Сколько связанных товаров хранить на товар после перестроения
+
+    # Скидки и акции
+    PRICING_RELOAD_INTERVAL_SECONDS: int = 10  # Как часто проверять изменения акций, сделанные другими процессами
+
     class Config:
         env_file = ".env"  # Поддержка загрузки переменных окружения из файла .env
 
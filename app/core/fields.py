@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, TypeAdapter, create_model
+
+
+def parse_fields(
+        fields: Optional[str],
+        schema: Type[BaseModel],
+        required: Sequence[str] = ("id",)
+) -> Tuple[str, ...]:
+    """
+    Разбирает параметр запроса fields=name,price и проверяет поля по списку полей схемы.\n
+    Обязательные поля (по умолчанию id) добавляются всегда, порядок полей берётся из схемы.\n
+    Аргументы:\n
+        \t fields (Optional[str]): Значение параметра fields через запятую. None — все поля схемы.
+        \t schema (Type[BaseModel]): Схема ответа, поля которой разрешено запрашивать.
+        \t required (Sequence[str]): Поля, которые возвращаются всегда.
+    Исключения:\n
+        \t HTTPException: Если запрошено поле, которого нет в схеме.
+    Возвращает:\n
+        \t Tuple[str, ...]: Имена выбранных полей.
+    """
+    allowed = tuple(schema.model_fields)
+    if not fields:
+        return allowed
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Недопустимые поля: {', '.join(sorted(unknown))}. Доступны: {', '.join(allowed)}"
+        )
+    return tuple(name for name in allowed if name in requested or name in required)
+
+
+def columns_for(entity: Any, fields: Sequence[str]) -> list:
+    """
+    Возвращает колонки модели SQLAlchemy для SELECT только выбранных полей.\n
+    Аргументы:\n
+        \t entity (Any): Модель SQLAlchemy.
+        \t fields (Sequence[str]): Имена полей, полученные из parse_fields.
+    Возвращает:\n
+        \t list: Атрибуты-колонки модели.
+    """
+    return [getattr(entity, name) for name in fields]
+
+
+@lru_cache(maxsize=256)
+def _projection_adapter(schema: Type[BaseModel], fields: Tuple[str, ...], many: bool) -> TypeAdapter:
+    """Строит и кэширует урезанную схему ответа для набора полей."""
+    projection = create_model(
+        f"{schema.__name__}Fields",
+        **{name: (schema.model_fields[name].annotation, ...) for name in fields}
+    )
+    return TypeAdapter(List[projection] if many else projection)
+
+
+def fields_json(schema: Type[BaseModel], fields: Tuple[str, ...], data: Any, many: bool = True) -> bytes:
+    """
+    Валидирует строки выборки по урезанной схеме и сериализует их в JSON.\n
+    Аргументы:\n
+        \t schema (Type[BaseModel]): Полная схема ответа.
+        \t fields (Tuple[str, ...]): Выбранные поля.
+        \t data (Any): Строка или список строк (mappings) результата запроса.
+        \t many (bool): Сериализовать список (True) или один объект (False).
+    Возвращает:\n
+        \t bytes: JSON-представление ответа.
+    """
+    adapter = _projection_adapter(schema, fields, many)
+    return adapter.dump_json(adapter.validate_python(data))
+
+
+def json_response(content: bytes) -> Response:
+    """Возвращает уже сериализованный JSON без повторной валидации по response_model."""
+    return Response(content=content, media_type="application/json")
@@ -0,0 +1,129 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import select, update, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.models import IdempotencyKey
+
+IDEMPOTENCY_PURGE_BATCH_SIZE = 1000
+
+
+def idempotency_fingerprint(*parts: str) -> str:
+    """Возвращает отпечаток запроса (маршрут и тело), с которым связан ключ идемпотентности."""
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+async def claim_idempotency_key(
+        db: AsyncSession,
+        user_id: int,
+        key: str,
+        fingerprint: str
+) -> Optional[Response]:
+    """
+    Занимает ключ идемпотентности в текущей транзакции или возвращает сохранённый ответ.\n
+    Ключ вставляется до выполнения записи. Если тот же ключ уже занят незавершённой транзакцией,
+    INSERT ... ON CONFLICT ждёт её окончания: после фиксации повтор получает сохранённый ответ,
+    после отката — сам занимает ключ. Просроченный ключ занимается заново.
+    Ответ нужно сохранить через save_idempotent_response в той же транзакции, что и запись.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t user_id (int): ID пользователя, в пределах которого уникален ключ.
+        \t key (str): Значение заголовка Idempotency-Key.
+        \t fingerprint (str): Отпечаток запроса из idempotency_fingerprint.
+    Исключения:\n
+        \t HTTPException: Если ключ уже использован с другим запросом.
+    Возвращает:\n
+        \t Optional[Response]: Сохранённый ответ для повтора или None, если ключ занят текущим запросом.
+    """
+    while True:
+        now = datetime.utcnow()
+        stmt = insert(IdempotencyKey).values(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            created_at=now,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "status_code": None,
+                "response_body": None,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at < now
+        ).returning(IdempotencyKey.key)
+        if (await db.execute(stmt)).first() is not None:
+            return None
+
+        stmt = select(
+            IdempotencyKey.fingerprint, IdempotencyKey.status_code, IdempotencyKey.response_body
+        ).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        stored = (await db.execute(stmt)).first()
+        if stored is None:
+            continue  # Ключ успели удалить как просроченный — пробуем занять снова
+
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key уже использован с другим запросом")
+        return Response(
+            content=stored.response_body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+
+async def save_idempotent_response(
+        db: AsyncSession,
+        user_id: int,
+        key: str,
+        status_code: int,
+        body: bytes
+) -> None:
+    """
+    Сохраняет ответ для занятого ключа идемпотентности. Транзакцию фиксирует вызывающий код.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t user_id (int): ID пользователя.
+        \t key (str): Значение заголовка Idempotency-Key.
+        \t status_code (int): HTTP-код ответа.
+        \t body (bytes): Сериализованное тело ответа.
+    """
+    stmt = (
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=body)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+async def purge_expired_idempotency_keys(db: AsyncSession) -> int:
+    """
+    Фоновая задача: удаляет просроченные ключи идемпотентности пачками.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+    Возвращает:\n
+        \t int: Количество удалённых ключей.
+    """
+    total = 0
+    while True:
+        expired = (
+            select(IdempotencyKey.user_id, IdempotencyKey.key)
+            .where(IdempotencyKey.expires_at < datetime.utcnow())
+            .limit(IDEMPOTENCY_PURGE_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = delete(IdempotencyKey).where(tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_(expired))
+        result = await db.execute(stmt)
+        await db.commit()
+        total += result.rowcount
+        if result.rowcount < IDEMPOTENCY_PURGE_BATCH_SIZE:
+            return total
@@ -70,3 +70,20 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+    """
+    Проверяет, является ли текущий активный пользователь администратором.\n
+    Единая зависимость для всех маршрутов, доступных только администраторам.\n
+    Аргументы:\n
+        \t current_user (User): Текущий активный пользователь, полученный из get_current_active_user.
+    Исключения:\n
+        \t HTTPException: 403, если пользователь не администратор.
+    Возвращает:\n
+        \t User
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Только администраторы могут получить доступ к этому ресурсу")
+    return current_user
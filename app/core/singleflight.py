@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from fastapi import HTTPException
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые запросы на чтение в один вызов.\n
+    Первый запрос с данным ключом выполняет функцию, остальные, пришедшие до её завершения,
+    ждут и получают тот же результат (или то же исключение). Это не кэш:
+    после завершения вызова следующий запрос снова идёт в базу.
+    """
+
+    def __init__(self, timeout: float):
+        """
+        Аргументы:\n
+            \t timeout (float): Сколько секунд ожидающие запросы ждут результат первого.
+        """
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет func или присоединяется к уже выполняющемуся вызову с тем же ключом.\n
+        Аргументы:\n
+            \t key (Hashable): Ключ запроса, например кортеж нормализованных параметров.
+            \t func (Callable): Асинхронная функция без аргументов, выполняющая чтение.
+        Исключения:\n
+            \t HTTPException: Если результат первого запроса не получен за timeout секунд.
+        Возвращает:\n
+            \t Any: Результат func. Его разделяют все запросы, поэтому он не должен изменяться (например, bytes).
+        """
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                break
+            try:
+                return await asyncio.wait_for(asyncio.shield(call), self.timeout)
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=504, detail="Превышено время ожидания ответа")
+            except asyncio.CancelledError:
+                # Отменён первый запрос (например, клиент отключился) — выполняем чтение сами
+                if call.cancelled():
+                    continue
+                raise
+
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as error:
+            call.set_exception(error)
+            call.exception()  # Помечаем исключение полученным, если ожидающих нет
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
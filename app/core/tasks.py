@@ -0,0 +1,29 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(job: Callable[[AsyncSession], Awaitable], interval: float) -> None:
+    """
+    Бесконечно запускает фоновую задачу с заданным интервалом.\n
+    Каждый запуск получает собственный сеанс базы данных; ошибка одного запуска
+    логируется и не останавливает последующие.\n
+    Аргументы:\n
+        \t job (Callable): Асинхронная функция, принимающая сеанс базы данных.
+        \t interval (float): Пауза между запусками в секундах.
+    """
+    while True:
+        try:
+            async with SessionLocal() as db:
+                await job(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Ошибка фоновой задачи %s", job.__name__)
+        await asyncio.sleep(interval)
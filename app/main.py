@@ -1,10 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.auth.importer import shutdown_hash_pool
 from app.auth.routes import router as auth_router
+from app.auth.tokens import purge_expired_refresh_tokens
 from app.products.routes import router as product_router
 from app.cart.routes import router as cart_router
+from app.cart.lifecycle import maintain_cart_items
+from app.core.config import settings
+from app.core.idempotency import purge_expired_idempotency_keys
+from app.core.tasks import run_periodically
+from app.pricing.engine import pricing_engine
+from app.pricing.routes import router as pricing_router
+from app.products.stock import sweep_expired_reservations
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запускает фоновые задачи на время жизни приложения и освобождает общие ресурсы при остановке."""
+    tasks = [
+        asyncio.create_task(
+            run_periodically(sweep_expired_reservations, settings.RESERVATION_SWEEP_INTERVAL_SECONDS)
+        ),
+        asyncio.create_task(
+            run_periodically(purge_expired_refresh_tokens, settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
+        ),
+        asyncio.create_task(
+            run_periodically(purge_expired_idempotency_keys, settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+        ),
+        asyncio.create_task(
+            run_periodically(maintain_cart_items, settings.CART_PURGE_INTERVAL_SECONDS)
+        ),
+        asyncio.create_task(
+            run_periodically(pricing_engine.reload, settings.PRICING_RELOAD_INTERVAL_SECONDS)
+        ),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    shutdown_hash_pool()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(auth_router, prefix="/auth")
 app.include_router(product_router, prefix="/products")
 app.include_router(cart_router, prefix="/cart")
+app.include_router(pricing_router, prefix="/pricing")
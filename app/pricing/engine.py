@@ -0,0 +1,214 @@
+"""
+Движок скидок для расчёта стоимости корзины.
+
+Активные акции загружаются из базы один раз и компилируются в неизменяемый снимок PricingRules:
+скидки на товары индексируются по ID товара (для каждого товара заранее выбраны лучший процент
+и лучшая фиксированная скидка), пороговые скидки на корзину хранятся отсортированным списком порогов
+для двоичного поиска. Расчёт корзины — один проход по её товарам без обращений к базе.
+
+Виды акций:
+    percent — скидка value% на товар product_id;
+    fixed — скидка value за каждую единицу товара product_id, но не больше его цены;
+    bundle — quantity единиц товара product_id за value (например, «3 по цене 2»);
+    tiered — скидка value% на корзину, если её сумма после скидок на товары не меньше threshold.
+Скидки на один товар не суммируются — применяется самая выгодная. Пороговая скидка применяется сверх них.
+"""
+import asyncio
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.pricing.models import Promotion
+
+
+class ProductRules(NamedTuple):
+    percent: int  # Лучший процент скидки на товар
+    percent_id: Optional[int]
+    fixed: int  # Лучшая фиксированная скидка за единицу товара
+    fixed_id: Optional[int]
+    bundles: Tuple[Tuple[int, int, int], ...]  # (количество в наборе, цена набора, ID акции)
+
+
+class CartPrice(NamedTuple):
+    subtotal: int  # Сумма без скидок
+    discount: int
+    total: int
+    promotions: Dict[int, int]  # ID применённой акции -> сумма скидки по ней
+
+
+class PricingRules:
+    """Скомпилированный неизменяемый снимок активных акций."""
+
+    def __init__(
+            self,
+            by_product: Dict[int, ProductRules],
+            thresholds: List[int],
+            tiers: List[Tuple[int, int]],
+            names: Dict[int, str]
+    ):
+        """
+        Аргументы:\n
+            \t by_product (Dict[int, ProductRules]): Скидки на товары по ID товара.
+            \t thresholds (List[int]): Пороги суммы корзины по возрастанию.
+            \t tiers (List[Tuple[int, int]]): Лучшие (процент, ID акции) среди порогов не выше thresholds[i].
+            \t names (Dict[int, str]): Названия акций по ID.
+        """
+        self.by_product = by_product
+        self.thresholds = thresholds
+        self.tiers = tiers
+        self.names = names
+
+    def price(self, lines: Iterable[Tuple[int, int, int]]) -> CartPrice:
+        """
+        Рассчитывает стоимость корзины со скидками.\n
+        Позиции одного товара складываются, чтобы наборы (bundle) считались по общему количеству.\n
+        Аргументы:\n
+            \t lines (Iterable[Tuple[int, int, int]]): Позиции корзины (ID товара, цена, количество).
+        Возвращает:\n
+            \t CartPrice: Сумма без скидок, скидка, итог и скидки по каждой применённой акции.
+        """
+        products: Dict[int, List[int]] = {}
+        for product_id, price, quantity in lines:
+            line = products.get(product_id)
+            if line is None:
+                products[product_id] = [price, quantity]
+            else:
+                line[1] += quantity
+
+        subtotal = discount = 0
+        applied: Dict[int, int] = {}
+        by_product = self.by_product
+        for product_id, (price, quantity) in products.items():
+            amount = price * quantity
+            subtotal += amount
+            rules = by_product.get(product_id)
+            if rules is None:
+                continue
+
+            best, best_id = 0, None
+            if rules.percent:
+                best, best_id = amount * rules.percent // 100, rules.percent_id
+            if rules.fixed:
+                saving = min(rules.fixed, price) * quantity
+                if saving > best:
+                    best, best_id = saving, rules.fixed_id
+            for size, bundle_price, promotion_id in rules.bundles:
+                saving = quantity // size * (size * price - bundle_price)
+                if saving > best:
+                    best, best_id = saving, promotion_id
+            if best:
+                discount += best
+                applied[best_id] = applied.get(best_id, 0) + best
+
+        index = bisect_right(self.thresholds, subtotal - discount) - 1
+        if index >= 0:
+            percent, promotion_id = self.tiers[index]
+            saving = (subtotal - discount) * percent // 100
+            if saving:
+                discount += saving
+                applied[promotion_id] = saving
+
+        return CartPrice(subtotal, discount, subtotal - discount, applied)
+
+
+def compile_rules(promotions: Iterable) -> PricingRules:
+    """
+    Компилирует акции в индексированный снимок PricingRules.\n
+    Аргументы:\n
+        \t promotions (Iterable): Активные акции — строки с полями модели Promotion.
+    Возвращает:\n
+        \t PricingRules: Снимок для расчёта корзин.
+    """
+    percents: Dict[int, Tuple[int, int]] = {}
+    fixed: Dict[int, Tuple[int, int]] = {}
+    bundles: Dict[int, List[Tuple[int, int, int]]] = {}
+    tiered: List[Tuple[int, int, int]] = []
+    names: Dict[int, str] = {}
+
+    for promotion in promotions:
+        names[promotion.id] = promotion.name
+        if promotion.kind == "percent":
+            if promotion.value > percents.get(promotion.product_id, (0,))[0]:
+                percents[promotion.product_id] = (promotion.value, promotion.id)
+        elif promotion.kind == "fixed":
+            if promotion.value > fixed.get(promotion.product_id, (0,))[0]:
+                fixed[promotion.product_id] = (promotion.value, promotion.id)
+        elif promotion.kind == "bundle":
+            bundles.setdefault(promotion.product_id, []).append(
+                (promotion.quantity, promotion.value, promotion.id)
+            )
+        elif promotion.kind == "tiered":
+            tiered.append((promotion.threshold, promotion.value, promotion.id))
+
+    by_product = {}
+    for product_id in percents.keys() | fixed.keys() | bundles.keys():
+        percent, percent_id = percents.get(product_id, (0, None))
+        amount, fixed_id = fixed.get(product_id, (0, None))
+        by_product[product_id] = ProductRules(
+            percent, percent_id, amount, fixed_id, tuple(bundles.get(product_id, ()))
+        )
+
+    # Для каждого порога заранее выбираем лучший процент среди всех порогов не выше него
+    tiered.sort()
+    thresholds, tiers = [], []
+    best = (0, None)
+    for threshold, percent, promotion_id in tiered:
+        if percent > best[0]:
+            best = (percent, promotion_id)
+        thresholds.append(threshold)
+        tiers.append(best)
+
+    return PricingRules(by_product, thresholds, tiers, names)
+
+
+class PricingEngine:
+    """
+    Хранит текущий снимок акций и атомарно заменяет его при изменениях.\n
+    Расчёт берёт ссылку на снимок один раз, поэтому одновременная перезагрузка не смешивает
+    старые и новые правила в одной корзине.
+    """
+
+    def __init__(self):
+        self.rules = compile_rules(())
+        self._version: Optional[tuple] = None
+        self._lock = asyncio.Lock()
+
+    async def reload(self, db: AsyncSession) -> bool:
+        """
+        Перекомпилирует акции, если таблица promotions изменилась с прошлой загрузки.\n
+        Изменение определяется дешёвым запросом количества строк и последнего updated_at.\n
+        Аргументы:\n
+            \t db (AsyncSession): Сеанс асинхронной базы данных.
+        Возвращает:\n
+            \t bool: True, если снимок был заменён.
+        """
+        async with self._lock:
+            version = tuple((await db.execute(select(func.count(), func.max(Promotion.updated_at)))).one())
+            if version == self._version:
+                return False
+
+            stmt = select(
+                Promotion.id,
+                Promotion.name,
+                Promotion.kind,
+                Promotion.product_id,
+                Promotion.value,
+                Promotion.quantity,
+                Promotion.threshold
+            ).where(Promotion.is_active == True)
+            result = await db.execute(stmt)
+            self.rules = compile_rules(result.all())
+            self._version = version
+            return True
+
+    async def get_rules(self, db: AsyncSession) -> PricingRules:
+        """Возвращает текущий снимок акций, загружая его при первом обращении."""
+        if self._version is None:
+            await self.reload(db)
+        return self.rules
+
+
+# Общий снимок акций процесса; в фоне перезагружается каждые PRICING_RELOAD_INTERVAL_SECONDS секунд
+pricing_engine = PricingEngine()
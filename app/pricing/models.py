@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, CheckConstraint
+from datetime import datetime
+from app.db.base import Base
+
+
+class Promotion(Base):
+    __tablename__ = "promotions"
+    __table_args__ = (
+        CheckConstraint("kind IN ('percent', 'fixed', 'bundle', 'tiered')", name="ck_promotions_kind"),
+        CheckConstraint("value > 0", name="ck_promotions_value_positive"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    kind = Column(String(16), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=True)  # Пусто у tiered
+    value = Column(Integer, nullable=False)  # Процент скидки, сумма скидки за единицу или цена набора
+    quantity = Column(Integer, nullable=True)  # Количество единиц в наборе (bundle)
+    threshold = Column(Integer, nullable=True)  # Минимальная сумма корзины (tiered)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,136 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from typing import List
+
+from app.auth.models import User
+from app.pricing.engine import pricing_engine
+from app.pricing.models import Promotion
+from app.pricing.schemas import PromotionCreate, PromotionOut, PromotionDelete
+from app.products.models import Product
+from app.core.security import get_current_admin_user
+from app.db.session import get_db
+
+router = APIRouter()
+
+
+async def check_promotion_product(db: AsyncSession, promotion_data: PromotionCreate) -> None:
+    """
+    Проверяет, что товар акции существует, до записи в базу.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t promotion_data (PromotionCreate): Данные акции.
+    Исключения:\n
+        \t HTTPException: Если товар акции не найден.
+    """
+    if promotion_data.product_id is not None and not await db.get(Product, promotion_data.product_id):
+        raise HTTPException(status_code=404, detail="Товар не найден")
+
+
+@router.get("/promotions", response_model=List[PromotionOut])
+async def get_promotions(
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+) -> list:
+    """
+    Возвращает все акции, включая неактивные.\n
+    Доступно только администраторам.\n
+    Аргументы:\n
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
+    Возвращает:\n
+        \t List[PromotionOut]: Список акций.
+    """
+    result = await db.execute(select(Promotion).order_by(Promotion.id))
+    return result.scalars().all()
+
+
+@router.post("/promotions", response_model=PromotionOut)
+async def create_promotion(
+        promotion_data: PromotionCreate,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+) -> Promotion:
+    """
+    Создаёт акцию и сразу перекомпилирует правила расчёта корзин.\n
+    Другие процессы приложения подхватывают изменение в течение PRICING_RELOAD_INTERVAL_SECONDS секунд.\n
+    Доступно только администраторам.\n
+    Аргументы:\n
+        \t promotion_data (PromotionCreate): Данные новой акции.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
+    Исключения:\n
+        \t HTTPException: Если товар акции не найден.
+    Возвращает:\n
+        \t PromotionOut: Созданная акция.
+    """
+    await check_promotion_product(db, promotion_data)
+    promotion = Promotion(**promotion_data.model_dump())
+    db.add(promotion)
+    await db.commit()
+    await db.refresh(promotion)
+    await pricing_engine.reload(db)
+    return promotion
+
+
+@router.put("/promotions/{promotion_id}", response_model=PromotionOut)
+async def update_promotion(
+        promotion_id: int,
+        promotion_data: PromotionCreate,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+) -> Promotion:
+    """
+    Изменяет акцию и сразу перекомпилирует правила расчёта корзин.\n
+    Доступно только администраторам.\n
+    Аргументы:\n
+        \t promotion_id (int): ID акции.
+        \t promotion_data (PromotionCreate): Новые данные акции.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
+    Исключения:\n
+        \t HTTPException: Если акция или товар акции не найдены.
+    Возвращает:\n
+        \t PromotionOut: Обновлённая акция.
+    """
+    promotion = await db.get(Promotion, promotion_id)
+    if not promotion:
+        raise HTTPException(status_code=404, detail="Акция не найдена")
+    await check_promotion_product(db, promotion_data)
+
+    for name, value in promotion_data.model_dump().items():
+        setattr(promotion, name, value)
+    await db.commit()
+    await db.refresh(promotion)
+    await pricing_engine.reload(db)
+    return promotion
+
+
+@router.delete("/promotions/{promotion_id}", response_model=PromotionDelete)
+async def delete_promotion(
+        promotion_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+) -> dict:
+    """
+    Удаляет акцию и сразу перекомпилирует правила расчёта корзин.\n
+    Доступно только администраторам.\n
+    Аргументы:\n
+        \t promotion_id (int): ID акции.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
+    Исключения:\n
+        \t HTTPException: Если акция не найдена.
+    Возвращает:\n
+        \t dict: Сообщение об успешном удалении акции.
+    """
+    promotion = await db.get(Promotion, promotion_id)
+    if not promotion:
+        raise HTTPException(status_code=404, detail="Акция не найдена")
+
+    await db.delete(promotion)
+    await db.commit()
+    await pricing_engine.reload(db)
+    return {"message": "Акция удалена"}
@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional
+from datetime import datetime
+
+
+class PromotionCreate(BaseModel):
+    name: str
+    kind: Literal["percent", "fixed", "bundle", "tiered"]
+    product_id: Optional[int] = None  # Товар акции; не указывается для tiered
+    value: int = Field(..., gt=0)  # Процент, скидка за единицу или цена набора
+    quantity: Optional[int] = Field(None, ge=2)  # Количество единиц в наборе для bundle
+    threshold: Optional[int] = Field(None, ge=0)  # Минимальная сумма корзины для tiered
+    is_active: bool = True
+
+    class Config:
+        json_schema_extra = {"example": {"name": "3 по цене 2", "kind": "bundle", "product_id": 1,
+                                         "value": 200, "quantity": 3}}
+
+    @model_validator(mode="after")
+    def check_kind_fields(self):
+        """
+        Валидатор полей акции в зависимости от её вида.
+        Выбрасывает:
+            ValueError: Если для вида акции не заполнены обязательные поля или процент больше 100.
+        """
+        if self.kind == "tiered":
+            if self.threshold is None or self.product_id is not None:
+                raise ValueError("Для tiered нужен threshold и не указывается product_id")
+        elif self.product_id is None:
+            raise ValueError(f"Для {self.kind} нужен product_id")
+        if self.kind == "bundle" and self.quantity is None:
+            raise ValueError("Для bundle нужно количество единиц в наборе quantity")
+        if self.kind in ("percent", "tiered") and self.value > 100:
+            raise ValueError("Процент скидки не может быть больше 100")
+        return self
+
+
+class PromotionOut(PromotionCreate):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PromotionDelete(BaseModel):
+    message: str
+
+    class Config:
+        json_schema_extra = {"example": {"message": "Акция удалена"}}
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import update, values, column, cast, func, Integer, String, Boolean
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.products.models import Product
+from app.products.schemas import ProductPatch
+
+# 4 параметра на строку: держимся далеко от лимита в 32767 параметров на запрос у asyncpg
+BULK_UPDATE_CHUNK_SIZE = 5000
+
+
+async def bulk_update_products(db: AsyncSession, patches: List[ProductPatch]) -> set[int]:
+    """
+    Применяет список изменений товаров запросами UPDATE ... FROM (VALUES ...).\n
+    Поля, равные None, не изменяются. Все обновлённые строки получают одинаковый updated_at.
+    Если один ID встречается несколько раз, применяется последнее изменение.
+    Транзакцию фиксирует вызывающий код.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t patches (List[ProductPatch]): Изменения товаров.
+    Возвращает:\n
+        \t set[int]: ID товаров, которые были найдены и обновлены.
+    """
+    rows = list({patch.id: (patch.id, patch.name, patch.price, patch.is_active) for patch in patches}.values())
+    now = datetime.utcnow()
+    updated = set()
+
+    for start in range(0, len(rows), BULK_UPDATE_CHUNK_SIZE):
+        patch = values(
+            column("id", Integer),
+            column("name", String),
+            column("price", Integer),
+            column("is_active", Boolean),
+            name="patch",
+        ).data(rows[start:start + BULK_UPDATE_CHUNK_SIZE])
+        stmt = (
+            update(Product)
+            .where(Product.id == patch.c.id)
+            .values(
+                # None попадает в VALUES нетипизированным NULL, поэтому тип задаём явно
+                name=func.coalesce(cast(patch.c.name, String), Product.name),
+                price=func.coalesce(cast(patch.c.price, Integer), Product.price),
+                is_active=func.coalesce(cast(patch.c.is_active, Boolean), Product.is_active),
+                updated_at=now,
+            )
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        updated.update(result.scalars().all())
+
+    return updated
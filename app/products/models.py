@@ -1,14 +1,41 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, CheckConstraint, Index
 from datetime import datetime
 from app.db.base import Base
 
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        CheckConstraint("stock >= 0", name="ck_products_stock_non_negative"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     price = Column(Integer, nullable=False)
+    stock = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = Column(Boolean, default=True)
+
+
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    cart_item_id = Column(Integer, nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class ProductCooccurrence(Base):
+    __tablename__ = "product_cooccurrence"
+    __table_args__ = (
+        Index("ix_product_cooccurrence_top", "product_id", "score"),
+    )
+
+    product_id = Column(Integer, primary_key=True)
+    related_product_id = Column(Integer, primary_key=True)
+    score = Column(Integer, nullable=False, default=0)  # Сколько корзин содержали оба товара одновременно
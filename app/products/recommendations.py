@@ -0,0 +1,222 @@
+"""
+Рекомендации «часто покупают вместе» на основе содержимого корзин.
+
+Индекс совместной встречаемости товаров хранится в таблице product_cooccurrence.
+Полное перестроение — это произведение разреженных матриц Bᵀ·B (B — корзины × товары),
+которое выполняется в базе одним запросом: самосоединение cart_items по user_id
+с агрегацией по парам товаров. При добавлении товара в корзину индекс обновляется инкрементально.
+
+Оба пути считают корзиной одно и то же: первые RECOMMENDATIONS_MAX_BASKET_SIZE различных товаров
+в порядке добавления. Товары сверх этого числа в пары не входят, поэтому несколько огромных корзин
+не раздувают квадратичное число пар. Удаление из корзины счётчики не уменьшает — расхождение
+исправляется очередным полным перестроением.
+
+Перестроение по расписанию (например, из cron):
+    python -m app.products.recommendations
+"""
+import asyncio
+import time
+from typing import List
+
+from sqlalchemy import Column, Integer, MetaData, PrimaryKeyConstraint, Table, and_, desc, exists, func, literal
+from sqlalchemy import select, text, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cart.models import CartItem
+from app.core.config import settings
+from app.products.models import Product, ProductCooccurrence
+
+# Новый индекс строится в отдельной таблице и подменяет рабочую переименованием
+staging_metadata = MetaData()
+cooccurrence_staging = Table(
+    "product_cooccurrence_new",
+    staging_metadata,
+    Column("product_id", Integer, nullable=False),
+    Column("related_product_id", Integer, nullable=False),
+    Column("score", Integer, nullable=False),
+    PrimaryKeyConstraint("product_id", "related_product_id", name="product_cooccurrence_new_pkey"),
+)
+# Сколько ждать блокировку рабочей таблицы при подмене и сколько раз повторять попытку
+SWAP_LOCK_TIMEOUT = "2s"
+SWAP_ATTEMPTS = 5
+
+
+async def rebuild_cooccurrence(db: AsyncSession) -> int:
+    """
+    Полностью перестраивает индекс совместной встречаемости товаров.\n
+    Индекс строится в таблице product_cooccurrence_new, не блокируя рабочую таблицу,
+    в которую в это время пишут корзины. Затем короткой транзакцией рабочая таблица удаляется,
+    а новая переименовывается на её место. Инкрементальные обновления, сделанные во время
+    построения, теряются — новый индекс и так учитывает почти все корзины.
+    Для каждого товара сохраняется не более RECOMMENDATIONS_KEEP_PER_PRODUCT связанных товаров.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+    Возвращает:\n
+        \t int: Количество сохранённых пар товаров.
+    """
+    # Первые RECOMMENDATIONS_MAX_BASKET_SIZE различных товаров каждой корзины в порядке добавления
+    first_added = (
+        select(CartItem.user_id, CartItem.product_id, func.min(CartItem.id).label("first_id"))
+        .group_by(CartItem.user_id, CartItem.product_id)
+        .subquery("first_added")
+    )
+    positions = select(
+        first_added.c.user_id,
+        first_added.c.product_id,
+        func.row_number().over(partition_by=first_added.c.user_id, order_by=first_added.c.first_id).label("position"),
+    ).subquery("positions")
+    baskets = (
+        select(positions.c.user_id, positions.c.product_id)
+        .where(positions.c.position <= settings.RECOMMENDATIONS_MAX_BASKET_SIZE)
+        .cte("baskets")
+    )
+    left, right = baskets.alias("a"), baskets.alias("b")
+    pairs = (
+        select(
+            left.c.product_id,
+            right.c.product_id.label("related_product_id"),
+            func.count().label("score"),
+        )
+        .join(right, and_(left.c.user_id == right.c.user_id, left.c.product_id != right.c.product_id))
+        .group_by(left.c.product_id, right.c.product_id)
+        .cte("pairs")
+    )
+    ranked = select(
+        pairs,
+        func.row_number().over(
+            partition_by=pairs.c.product_id,
+            order_by=(pairs.c.score.desc(), pairs.c.related_product_id)
+        ).label("rank"),
+    ).cte("ranked")
+    stmt = (
+        insert(cooccurrence_staging)
+        .from_select(
+            ["product_id", "related_product_id", "score"],
+            select(ranked.c.product_id, ranked.c.related_product_id, ranked.c.score)
+            .where(ranked.c.rank <= settings.RECOMMENDATIONS_KEEP_PER_PRODUCT)
+        )
+    )
+
+    connection = await db.connection()
+    await connection.run_sync(cooccurrence_staging.drop, checkfirst=True)
+    await connection.run_sync(cooccurrence_staging.create)
+    result = await db.execute(stmt)
+    # Индекс для выдачи строится после загрузки — так быстрее, чем обновлять его на каждую строку
+    await db.execute(text(
+        "CREATE INDEX ix_product_cooccurrence_top_new ON product_cooccurrence_new (product_id, score)"
+    ))
+    await db.commit()
+
+    await swap_cooccurrence(db)
+    return result.rowcount
+
+
+async def swap_cooccurrence(db: AsyncSession) -> None:
+    """
+    Подменяет рабочую таблицу product_cooccurrence построенной product_cooccurrence_new.\n
+    Блокировка рабочей таблицы ждётся не дольше SWAP_LOCK_TIMEOUT, чтобы не задерживать корзины;
+    если её держит долгая транзакция, попытка повторяется до SWAP_ATTEMPTS раз.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+    Исключения:\n
+        \t DBAPIError: Если блокировку так и не удалось получить.
+    """
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            await db.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+            await db.execute(text("DROP TABLE product_cooccurrence"))
+            await db.execute(text("ALTER TABLE product_cooccurrence_new RENAME TO product_cooccurrence"))
+            await db.execute(text(
+                "ALTER INDEX product_cooccurrence_new_pkey RENAME TO product_cooccurrence_pkey"
+            ))
+            await db.execute(text(
+                "ALTER INDEX ix_product_cooccurrence_top_new RENAME TO ix_product_cooccurrence_top"
+            ))
+            await db.commit()
+            return
+        except Exception:
+            await db.rollback()
+            if attempt == SWAP_ATTEMPTS:
+                raise
+            await asyncio.sleep(attempt)
+
+
+async def record_cart_addition(db: AsyncSession, user_id: int, product_id: int, cart_item_id: int) -> None:
+    """
+    Инкрементально обновляет индекс после добавления товара в корзину.\n
+    Если товара ещё не было в корзине пользователя и он входит в первые RECOMMENDATIONS_MAX_BASKET_SIZE
+    различных товаров корзины, счётчики пар с каждым товаром корзины увеличиваются на единицу
+    в обе стороны одним INSERT ... ON CONFLICT DO UPDATE.
+    Вызывается отдельной транзакцией после фиксации позиции, чтобы блокировки строк индекса
+    не удерживались вместе с блокировкой остатка товара; транзакцию фиксирует вызывающий код.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t user_id (int): ID пользователя.
+        \t product_id (int): ID добавленного товара.
+        \t cart_item_id (int): ID только что созданной позиции корзины.
+    """
+    already_in_cart = exists().where(
+        CartItem.user_id == user_id, CartItem.product_id == product_id, CartItem.id != cart_item_id
+    )
+    others = (
+        select(CartItem.product_id)
+        .where(CartItem.user_id == user_id, CartItem.product_id != product_id, ~already_in_cart)
+        .distinct()
+        .cte("others")
+    )
+    # Та же граница корзины, что и при перестроении: товар сверх лимита в пары не входит
+    basket_size = select(func.count()).select_from(others).scalar_subquery()
+    within_basket = basket_size < settings.RECOMMENDATIONS_MAX_BASKET_SIZE
+    pairs = union_all(
+        select(literal(product_id).label("product_id"), others.c.product_id.label("related_product_id"))
+        .where(within_basket),
+        select(others.c.product_id, literal(product_id)).where(within_basket),
+    ).subquery("pairs")
+    # Единый порядок блокировки строк защищает от взаимоблокировок параллельных корзин
+    ordered = (
+        select(pairs.c.product_id, pairs.c.related_product_id, literal(1))
+        .order_by(pairs.c.product_id, pairs.c.related_product_id)
+    )
+    stmt = insert(ProductCooccurrence).from_select(["product_id", "related_product_id", "score"], ordered)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductCooccurrence.product_id, ProductCooccurrence.related_product_id],
+        set_={"score": ProductCooccurrence.score + 1}
+    )
+    await db.execute(stmt)
+
+
+async def get_related_products(db: AsyncSession, product_id: int, limit: int) -> List[dict]:
+    """
+    Возвращает активные товары, которые чаще всего лежат в корзине вместе с данным.\n
+    Запрос читает не более limit строк индекса (product_id, score) без сортировки.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t product_id (int): ID товара.
+        \t limit (int): Количество рекомендаций.
+    Возвращает:\n
+        \t List[dict]: ID, название, цена товаров и количество совместных корзин.
+    """
+    stmt = (
+        select(Product.id, Product.name, Product.price, ProductCooccurrence.score)
+        .join(ProductCooccurrence, ProductCooccurrence.related_product_id == Product.id)
+        .where(ProductCooccurrence.product_id == product_id, Product.is_active == True)
+        .order_by(desc(ProductCooccurrence.score))
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return result.mappings().all()
+
+
+async def main() -> None:
+    import app.auth.models  # noqa: F401 (регистрирует User для связей CartItem)
+    from app.db.session import SessionLocal
+
+    started = time.perf_counter()
+    async with SessionLocal() as db:
+        pairs = await rebuild_cooccurrence(db)
+    print(f"Индекс перестроен: {pairs} пар за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,75 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from typing import List
-from app.products.schemas import ProductCreate, ProductUpdate, ProductOut, ProductDelete
+from typing import List, Optional
+from app.products.schemas import (
+    ProductCreate,
+    ProductUpdate,
+    ProductOut,
+    ProductDelete,
+    ProductPatch,
+    ProductBulkUpdateOut,
+    RelatedProductOut,
+    StockAdjust,
+    StockOut
+)
 from app.products.models import Product
+from app.products.bulk import bulk_update_products
+from app.products.recommendations import get_related_products
+from app.products.stock import adjust_stock
 from app.auth.models import User
-from app.core.security import get_current_user
+from app.core.config import settings
+from app.core.fields import parse_fields, columns_for, fields_json, json_response
+from app.core.idempotency import idempotency_fingerprint, claim_idempotency_key, save_idempotent_response
+from app.core.singleflight import SingleFlight
+from app.core.security import get_current_admin_user
 from app.db.session import get_db
 
 router = APIRouter()
 
+# Одновременные одинаковые запросы списка товаров выполняют один запрос к базе
+products_flight = SingleFlight(settings.SINGLE_FLIGHT_TIMEOUT_SECONDS)
 
-def is_admin(current_user: User = Depends(get_current_user)):
+
+@router.get("/products", response_model=List[ProductOut])
+async def get_products(
+        fields: Optional[str] = Query(None, description="Поля ответа через запятую, например id,name,price"),
+        db: AsyncSession = Depends(get_db)
+) -> Response:
     """
-    Проверяет, является ли пользователь администратором.\n
-    Если пользователь не является администратором, генерируется исключение HTTPException\n
-    с кодом 403 (Forbidden) и сообщением "Только администраторы могут получить доступ к этому ресурсу".\n
+    Возвращает список активных товаров.\n
+    Активными считаются товары, у которых поле `is_active` равно `True`.\n
+    Из базы читаются только запрошенные в `fields` колонки.
+    Одновременные запросы с одинаковым набором полей получают результат одного обращения к базе.\n
     Аргументы:\n
-        \t current_user (User): Текущий пользователь, полученный из функции get_current_user.
+        \t fields (Optional[str]): Поля ответа через запятую. По умолчанию возвращаются все поля ProductOut.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+    Исключения:\n
+        \t HTTPException: Если запрошено недопустимое поле.
     Возвращает:\n
-        \t User
+        \t List[ProductOut]: Список активных товаров.
     """
-    if not current_user.is_admin:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Только администраторы могут получить доступ к этому ресурсу")
-    return current_user
+    names = parse_fields(fields, ProductOut)
 
+    async def load_products() -> bytes:
+        stmt = select(*columns_for(Product, names)).where(Product.is_active == True)
+        result = await db.execute(stmt)
+        return fields_json(ProductOut, names, result.mappings().all())
 
-@router.get("/products", response_model=List[ProductOut])
-async def get_products(db: AsyncSession = Depends(get_db)) -> List[ProductOut]:
+    return json_response(await products_flight.do(names, load_products))
+
+
+@router.get("/products/{product_id}/related", response_model=List[RelatedProductOut])
+async def get_related(
+        product_id: int,
+        limit: int = Query(10, ge=1, le=50),
+        db: AsyncSession = Depends(get_db)
+) -> list:
     """
-    Возвращает список активных товаров.\n
-    Активными считаются товары, у которых поле `is_active` равно `True`.\n
+    Возвращает товары, которые часто покупают вместе с данным.\n
+    Рекомендации читаются из заранее рассчитанного индекса совместной встречаемости в корзинах.\n
     Аргументы:\n
+        \t product_id (int): ID товара.
+        \t limit (int): Количество рекомендаций, от 1 до 50.
         \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
     Возвращает:\n
-        \t List[ProductOut]: Список активных товаров.
+        \t List[RelatedProductOut]: Связанные активные товары по убыванию частоты совместных покупок.
     """
-    stmt = select(Product).where(Product.is_active == True)
-    result = await db.execute(stmt)
-    products = result.scalars().all()
-    return products
+    return await get_related_products(db, product_id, limit)
 
 
 @router.post("/products", response_model=ProductOut)
 async def create_product(
         product_data: ProductCreate,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(is_admin)
-) -> ProductOut:
+        current_user: User = Depends(get_current_admin_user)
+) -> Response:
     """
     Создает новый товар в базе данных.\n
+    Повтор запроса с тем же заголовком Idempotency-Key возвращает сохранённый ответ, не создавая товар ещё раз.\n
     Доступно только администраторам.\n
     Аргументы:\n
         \t product_data (ProductCreate): Данные нового товара.
+        \t idempotency_key (Optional[str]): Ключ идемпотентности из заголовка Idempotency-Key.
         \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
-        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(is_admin).
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
+    Исключения:\n
+        \t HTTPException: Если Idempotency-Key уже использован с другим запросом.
     Возвращает:\n
         \t ProductOut: Созданный товар.
     """
+    if idempotency_key:
+        fingerprint = idempotency_fingerprint("POST /products/products", product_data.model_dump_json())
+        replay = await claim_idempotency_key(db, current_user.id, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+
     new_product = Product(
         name=product_data.name,
         price=product_data.price,
+        stock=product_data.stock,
         is_active=product_data.is_active
     )
     db.add(new_product)
+    await db.flush()
+
+    body = ProductOut.model_validate(new_product).model_dump_json().encode()
+    if idempotency_key:
+        await save_idempotent_response(db, current_user.id, idempotency_key, 200, body)
     await db.commit()
-    await db.refresh(new_product)
-    return new_product
+    return json_response(body)
 
 
 @router.put("/products/{product_id}", response_model=ProductUpdate)
@@ -77,7 +128,7 @@ async def update_product(
         product_id: int,
         product_data: ProductCreate,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(is_admin)
+        current_user: User = Depends(get_current_admin_user)
 ) -> ProductUpdate:
     """
     Обновляет существующий товар в базе данных.\n
@@ -86,7 +137,7 @@ async def update_product(
         \t product_id (int): ID товара для обновления.
         \t product_data (ProductUpdate): Данные для обновления товара.
         \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
-        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(is_admin).
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
     Исключения:\n
         \t HTTPException: Если товар не найден в базе данных.
     Возвращает:\n
@@ -108,11 +159,70 @@ async def update_product(
     return product
 
 
+@router.patch("/products", response_model=ProductBulkUpdateOut)
+async def bulk_update(
+        patches: List[ProductPatch],
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+) -> dict:
+    """
+    Массово обновляет цену, название и активность товаров одной транзакцией.\n
+    Не переданные (None) поля товара остаются без изменений.\n
+    Доступно только администраторам.\n
+    Аргументы:\n
+        \t patches (List[ProductPatch]): Список изменений с ID товаров.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
+    Возвращает:\n
+        \t dict: Количество обновлённых и не найденных товаров и результат по каждому ID.
+    """
+    updated = await bulk_update_products(db, patches)
+    await db.commit()
+
+    results = []
+    for product_id in dict.fromkeys(patch.id for patch in patches):
+        results.append({"id": product_id, "status": "updated" if product_id in updated else "not_found"})
+    return {"updated": len(updated), "not_found": len(results) - len(updated), "results": results}
+
+
+@router.post("/products/{product_id}/stock", response_model=StockOut)
+async def change_product_stock(
+        product_id: int,
+        stock_data: StockAdjust,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+) -> dict:
+    """
+    Пополняет или списывает остаток товара на складе.\n
+    Изменение выполняется атомарно относительно резервирования товара в корзинах.\n
+    Доступно только администраторам.\n
+    Аргументы:\n
+        \t product_id (int): ID товара.
+        \t stock_data (StockAdjust): Изменение остатка.
+        \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
+        \t current_user (User): Текущий авторизованный пользователь. Defaults to Depends(get_current_admin_user).
+    Исключения:\n
+        \t HTTPException: Если товар не найден или остаток стал бы отрицательным.
+    Возвращает:\n
+        \t dict: ID товара и новый остаток.
+    """
+    stock = await adjust_stock(db, product_id, stock_data.delta)
+    if stock is None:
+        await db.rollback()
+        product = await db.get(Product, product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Товар не найден")
+        raise HTTPException(status_code=409, detail="Недостаточно товара на складе")
+
+    await db.commit()
+    return {"product_id": product_id, "stock": stock}
+
+
 @router.delete("/products/{product_id}", response_model=ProductDelete)
 async def delete_product(
         product_id: int,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(is_admin)
+        current_user: User = Depends(get_current_admin_user)
 )-> dict:
     """
     Удаляет товар из базы данных по его ID.\n
@@ -120,7 +230,7 @@ async def delete_product(
     Аргументы:\n
         \t product_id (int): ID товара для удаления.
         \t db (AsyncSession, optional): Сеанс асинхронной базы данных. По умолчанию получается из зависимости get_db.
-        \t current_user (User, optional): Текущий пользователь. По умолчанию получается из зависимости is_admin.
+        \t current_user (User, optional): Текущий пользователь. По умолчанию получается из зависимости get_current_admin_user.
     Исключения:\n
         \t HTTPException: Если товар с указанным идентификатором не найден.
     Возвращает:\n
@@ -1,11 +1,13 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
 class ProductCreate(BaseModel):
     name: str
     price: int = Field(..., gt=0)  # Цена должна быть больше 0
+    stock: int = Field(0, ge=0)  # Начальный остаток на складе
+    is_active: bool = True
 
 
 class ProductUpdate(BaseModel):
@@ -22,6 +24,7 @@ class ProductOut(BaseModel):
     id: int
     name: str
     price: int
+    stock: int
     created_at: datetime
     updated_at: datetime
     is_active: bool
@@ -36,3 +39,43 @@ class ProductDelete(BaseModel):
     class Config:
         from_attributes = True
         json_schema_extra = {"example": {"message": "Товар удален"}}
+
+
+class StockAdjust(BaseModel):
+    delta: int  # Положительное значение пополняет склад, отрицательное списывает
+
+    class Config:
+        json_schema_extra = {"example": {"delta": 100}}
+
+
+class StockOut(BaseModel):
+    product_id: int
+    stock: int
+
+
+class ProductPatch(BaseModel):
+    id: int
+    name: Optional[str] = None
+    price: Optional[int] = Field(None, gt=0)
+    is_active: Optional[bool] = None
+
+    class Config:
+        json_schema_extra = {"example": {"id": 1, "price": 150, "is_active": True}}
+
+
+class ProductPatchResult(BaseModel):
+    id: int
+    status: Literal["updated", "not_found"]
+
+
+class ProductBulkUpdateOut(BaseModel):
+    updated: int
+    not_found: int
+    results: List[ProductPatchResult]
+
+
+class RelatedProductOut(BaseModel):
+    id: int
+    name: str
+    price: int
+    score: int  # Количество корзин, в которых товар лежал вместе с исходным
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cart.models import CartItem
+from app.core.config import settings
+from app.products.models import Product, StockReservation
+
+
+async def take_stock(db: AsyncSession, product_id: int, quantity: int) -> bool:
+    """
+    Атомарно списывает остаток товара одним условным UPDATE ... WHERE stock >= n RETURNING.\n
+    Блокировка строки товара удерживается только до конца текущей транзакции,
+    поэтому транзакцию после вызова нужно завершать как можно быстрее.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t product_id (int): ID товара.
+        \t quantity (int): Количество списываемых единиц.
+    Возвращает:\n
+        \t bool: True, если остатка хватило и он списан; False, если товар не найден, неактивен или закончился.
+    """
+    stmt = (
+        update(Product)
+        .where(Product.id == product_id, Product.is_active == True, Product.stock >= quantity)
+        # Движение остатка не считается изменением карточки товара, updated_at не трогаем
+        .values(stock=Product.stock - quantity, updated_at=Product.updated_at)
+        .returning(Product.stock)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none() is not None
+
+
+async def adjust_stock(db: AsyncSession, product_id: int, delta: int) -> Optional[int]:
+    """
+    Изменяет остаток товара на delta (пополнение или списание администратором).\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t product_id (int): ID товара.
+        \t delta (int): Изменение остатка, может быть отрицательным.
+    Возвращает:\n
+        \t Optional[int]: Новый остаток или None, если товар не найден либо остаток стал бы отрицательным.
+    """
+    stmt = (
+        update(Product)
+        .where(Product.id == product_id, Product.stock + delta >= 0)
+        .values(stock=Product.stock + delta, updated_at=Product.updated_at)
+        .returning(Product.stock)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+def add_reservation(db: AsyncSession, cart_item: CartItem) -> StockReservation:
+    """
+    Создаёт резерв под позицию корзины, для которой остаток уже списан через take_stock.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t cart_item (CartItem): Сохранённая (flush) позиция корзины.
+    Возвращает:\n
+        \t StockReservation: Добавленный в сессию резерв.
+    """
+    reservation = StockReservation(
+        product_id=cart_item.product_id,
+        user_id=cart_item.user_id,
+        cart_item_id=cart_item.id,
+        quantity=cart_item.quantity,
+        expires_at=datetime.utcnow() + timedelta(minutes=settings.RESERVATION_TTL_MINUTES)
+    )
+    db.add(reservation)
+    return reservation
+
+
+async def release_reservation(db: AsyncSession, cart_item_id: int) -> None:
+    """
+    Снимает резерв позиции корзины и возвращает товар на склад.\n
+    Если резерв уже истёк и был освобождён фоновой задачей, ничего не делает.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t cart_item_id (int): ID позиции корзины.
+    """
+    stmt = (
+        delete(StockReservation)
+        .where(StockReservation.cart_item_id == cart_item_id)
+        .returning(StockReservation.product_id, StockReservation.quantity)
+    )
+    result = await db.execute(stmt)
+    for product_id, quantity in result.all():
+        await adjust_stock(db, product_id, quantity)
+
+
+async def release_expired_reservations(db: AsyncSession, batch_size: int) -> int:
+    """
+    Освобождает пачку просроченных резервов одним запросом.\n
+    Строки выбираются через FOR UPDATE SKIP LOCKED, поэтому несколько воркеров
+    могут чистить резервы параллельно, не ожидая друг друга.
+    Остатки возвращаются агрегированно: по одному UPDATE на товар в пачке.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+        \t batch_size (int): Максимальное количество резервов в пачке.
+    Возвращает:\n
+        \t int: Количество освобождённых резервов.
+    """
+    expired = (
+        select(StockReservation.id)
+        .where(StockReservation.expires_at < datetime.utcnow())
+        .order_by(StockReservation.expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .cte("expired")
+    )
+    released = (
+        delete(StockReservation)
+        .where(StockReservation.id.in_(select(expired.c.id)))
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .cte("released")
+    )
+    totals = (
+        select(released.c.product_id, func.sum(released.c.quantity).label("quantity"))
+        .group_by(released.c.product_id)
+        .subquery("totals")
+    )
+    restocked = (
+        update(Product)
+        .where(Product.id == totals.c.product_id)
+        .values(stock=Product.stock + totals.c.quantity, updated_at=Product.updated_at)
+        .returning(Product.id)
+        .cte("restocked")
+    )
+    stmt = select(func.count()).select_from(released).add_cte(restocked)
+    result = await db.execute(stmt)
+    return result.scalar_one()
+
+
+async def sweep_expired_reservations(db: AsyncSession) -> int:
+    """
+    Фоновая задача: освобождает все просроченные резервы пачками,
+    фиксируя каждую пачку отдельной короткой транзакцией.\n
+    Аргументы:\n
+        \t db (AsyncSession): Сеанс асинхронной базы данных.
+    Возвращает:\n
+        \t int: Общее количество освобождённых резервов.
+    """
+    batch_size = settings.RESERVATION_SWEEP_BATCH_SIZE
+    total = 0
+    while True:
+        released = await release_expired_reservations(db, batch_size)
+        await db.commit()
+        total += released
+        if released < batch_size:
+            return total
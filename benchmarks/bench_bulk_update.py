@@ -0,0 +1,58 @@
+"""
+Нагрузочный тест массового обновления товаров.
+
+Создаёт --rows товаров и обновляет их цены одним вызовом bulk_update_products
+(UPDATE ... FROM (VALUES ...) пачками по BULK_UPDATE_CHUNK_SIZE). Проверяет, что обновлены
+все строки и что обновление уложилось в --max-seconds.
+
+Запуск (только на отдельной тестовой базе с применёнными миграциями):
+    python -m benchmarks.bench_bulk_update --rows 10000 --max-seconds 1
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.auth.models  # noqa: F401 (регистрирует User для связей CartItem)
+from app.core.config import settings
+from app.products.bulk import bulk_update_products
+from app.products.models import Product
+from app.products.schemas import ProductPatch
+
+
+async def main(rows: int, max_seconds: float) -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        result = await db.execute(text(
+            "INSERT INTO products (name, price, stock, is_active) "
+            "SELECT 'bench ' || n, 100, 0, true FROM generate_series(1, :rows) AS n RETURNING id"
+        ), {"rows": rows})
+        product_ids = result.scalars().all()
+        await db.commit()
+
+        patches = [ProductPatch(id=product_id, price=150 + product_id % 50) for product_id in product_ids]
+        started = time.perf_counter()
+        updated = await bulk_update_products(db, patches)
+        await db.commit()
+        elapsed = time.perf_counter() - started
+
+        await db.execute(delete(Product).where(Product.id.in_(product_ids)))
+        await db.commit()
+    await engine.dispose()
+
+    print(f"строк: {rows}, обновлено: {len(updated)}, время: {elapsed:.3f} с, {rows / elapsed:.0f} строк/с")
+    assert len(updated) == rows, "Обновлены не все товары"
+    assert elapsed <= max_seconds, f"Обновление заняло больше {max_seconds} с"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--max-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.max_seconds))
@@ -0,0 +1,97 @@
+"""
+Нагрузочный тест расчёта корзины со скидками.
+
+Генерирует синтетические акции всех видов и корзины разного размера, замеряет время компиляции
+правил и расчёта одной корзины скомпилированным движком. Для сравнения корзина также считается
+наивным перебором всех акций для каждой позиции. База данных не нужна.
+
+Запуск:
+    python -m benchmarks.bench_pricing --rules 100 1000 10000 100000 --items 1 10 100 1000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from app.pricing.engine import compile_rules
+
+PRODUCTS = 100000
+KINDS = ("percent", "fixed", "bundle", "tiered")
+
+
+def make_promotions(count: int) -> list:
+    promotions = []
+    for promotion_id in range(1, count + 1):
+        kind = random.choice(KINDS)
+        promotions.append(SimpleNamespace(
+            id=promotion_id,
+            name=f"bench {promotion_id}",
+            kind=kind,
+            product_id=None if kind == "tiered" else random.randint(1, PRODUCTS),
+            value=random.randint(1, 50) if kind in ("percent", "tiered") else random.randint(1, 500),
+            quantity=random.randint(2, 5) if kind == "bundle" else None,
+            threshold=random.randint(0, 100000) if kind == "tiered" else None,
+        ))
+    return promotions
+
+
+def make_cart(items: int) -> list:
+    # Товары в корзине не повторяются, чтобы наивный построчный расчёт совпадал с движком
+    return [(product_id, 100 + product_id % 900, random.randint(1, 5))
+            for product_id in random.sample(range(1, PRODUCTS + 1), items)]
+
+
+def naive_price(promotions: list, lines: list) -> int:
+    """Перебирает все акции для каждой позиции — так выглядел бы расчёт без компиляции правил."""
+    subtotal = discount = 0
+    for product_id, price, quantity in lines:
+        amount = price * quantity
+        subtotal += amount
+        best = 0
+        for promotion in promotions:
+            if promotion.product_id != product_id:
+                continue
+            if promotion.kind == "percent":
+                best = max(best, amount * promotion.value // 100)
+            elif promotion.kind == "fixed":
+                best = max(best, min(promotion.value, price) * quantity)
+            elif promotion.kind == "bundle":
+                best = max(best, quantity // promotion.quantity * (promotion.quantity * price - promotion.value))
+        discount += best
+    tiers = [p.value for p in promotions if p.kind == "tiered" and p.threshold <= subtotal - discount]
+    return subtotal - discount - (subtotal - discount) * max(tiers, default=0) // 100
+
+
+def measure(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main(rule_counts: list, item_counts: list, carts: int) -> None:
+    print(f"{'акций':>8} {'позиций':>8} {'компиляция, мс':>15} {'движок, мкс':>12} {'перебор, мкс':>13}")
+    for rule_count in rule_counts:
+        promotions = make_promotions(rule_count)
+        started = time.perf_counter()
+        rules = compile_rules(promotions)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        for item_count in item_counts:
+            cart_list = [make_cart(item_count) for _ in range(carts)]
+            for lines in cart_list:
+                assert rules.price(lines).total == naive_price(promotions, lines), "Расчёты не совпадают"
+            engine_us = measure(lambda: [rules.price(lines) for lines in cart_list], 1) / carts
+            naive_repeat = max(1, min(carts, 10 ** 6 // (rule_count * item_count)))
+            naive_us = measure(lambda: [naive_price(promotions, lines) for lines in cart_list[:naive_repeat]], 1)
+            naive_us /= naive_repeat
+            print(f"{rule_count:>8} {item_count:>8} {compile_ms:>15.1f} {engine_us:>12.1f} {naive_us:>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--carts", type=int, default=100)
+    args = parser.parse_args()
+    main(args.rules, args.items, args.carts)
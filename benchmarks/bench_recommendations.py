@@ -0,0 +1,114 @@
+"""
+Нагрузочный тест рекомендаций «часто покупают вместе».
+
+Заполняет cart_items синтетическими корзинами (по умолчанию миллионы позиций),
+замеряет полное перестроение индекса, инкрементальные обновления и время выдачи рекомендаций.
+Популярность товаров распределена неравномерно: малые ID встречаются в корзинах чаще.
+
+Запуск (только на отдельной тестовой базе с применёнными миграциями, таблицы очищаются):
+    python -m benchmarks.bench_recommendations --users 200000 --products 20000 --basket 10 --lookups 2000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.models import User
+from app.cart.models import CartItem
+from app.core.config import settings
+from app.products.models import Product, ProductCooccurrence
+from app.products.recommendations import get_related_products, rebuild_cooccurrence, record_cart_addition
+
+
+async def seed(db: AsyncSession, users: int, products: int, basket: int) -> None:
+    await db.execute(text(
+        "INSERT INTO users (full_name, email, phone, hashed_password, is_active, is_admin) "
+        "SELECT 'bench', 'bench' || n || '@example.com', '+7' || n, '-', true, false "
+        "FROM generate_series(1, :users) AS n"
+    ), {"users": users})
+    await db.execute(text(
+        "INSERT INTO products (name, price, stock, is_active) "
+        "SELECT 'bench ' || n, 100, 0, true FROM generate_series(1, :products) AS n"
+    ), {"products": products})
+    # Квадрат равномерной величины смещает выбор к началу списка товаров (популярные товары)
+    await db.execute(text(
+        "INSERT INTO cart_items (user_id, product_id, quantity) "
+        "SELECT u.id, p.ids[1 + floor(power(random(), 2) * :products)::int], 1 "
+        "FROM (SELECT id FROM users WHERE full_name = 'bench') AS u "
+        "CROSS JOIN generate_series(1, :basket) "
+        "CROSS JOIN (SELECT array_agg(id ORDER BY id) AS ids FROM products WHERE name LIKE 'bench %') AS p"
+    ), {"products": products, "basket": basket})
+    await db.commit()
+    await db.execute(text("ANALYZE cart_items"))
+
+
+async def cleanup(db: AsyncSession) -> None:
+    await db.execute(delete(ProductCooccurrence))
+    await db.execute(delete(CartItem).where(CartItem.user_id.in_(
+        text("SELECT id FROM users WHERE full_name = 'bench'")
+    )))
+    await db.execute(delete(User).where(User.full_name == "bench"))
+    await db.execute(delete(Product).where(Product.name.like("bench %")))
+    await db.commit()
+
+
+async def main(users: int, products: int, basket: int, lookups: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        started = time.perf_counter()
+        await seed(db, users, products, basket)
+        print(f"позиций в корзинах: {users * basket}, заполнено за {time.perf_counter() - started:.1f} с")
+
+        started = time.perf_counter()
+        pairs = await rebuild_cooccurrence(db)
+        print(f"перестроение индекса: {pairs} пар за {time.perf_counter() - started:.1f} с")
+
+        product_ids = (await db.execute(text(
+            "SELECT id FROM products WHERE name LIKE 'bench %' ORDER BY id"
+        ))).scalars().all()
+        user_ids = (await db.execute(text(
+            "SELECT id FROM users WHERE full_name = 'bench' LIMIT :n"
+        ), {"n": lookups})).scalars().all()
+
+        # Как в add_to_cart: позиция фиксируется первой, индекс обновляется отдельной транзакцией.
+        # Замеряется только обновление индекса
+        timings = []
+        for user_id in user_ids:
+            cart_item = CartItem(user_id=user_id, product_id=random.choice(product_ids), quantity=1)
+            db.add(cart_item)
+            await db.commit()
+            started = time.perf_counter()
+            await record_cart_addition(db, user_id, cart_item.product_id, cart_item.id)
+            await db.commit()
+            timings.append(time.perf_counter() - started)
+        print(f"инкрементальное обновление: медиана {statistics.median(timings) * 1000:.2f} мс, "
+              f"p99 {statistics.quantiles(timings, n=100)[98] * 1000:.2f} мс")
+
+        timings = []
+        for _ in range(lookups):
+            product_id = product_ids[int(random.random() ** 2 * len(product_ids))]
+            started = time.perf_counter()
+            await get_related_products(db, product_id, 10)
+            timings.append(time.perf_counter() - started)
+        print(f"выдача рекомендаций: медиана {statistics.median(timings) * 1000:.2f} мс, "
+              f"p99 {statistics.quantiles(timings, n=100)[98] * 1000:.2f} мс")
+
+        await cleanup(db)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--basket", type=int, default=10)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.products, args.basket, args.lookups))
@@ -0,0 +1,112 @@
+"""
+Нагрузочный тест резервирования товара.
+
+Множество клиентов одновременно добавляют в корзину один и тот же товар. Каждая попытка
+выполняет ту же транзакцию, что и POST /cart/cart с заголовком Idempotency-Key: ключ
+идемпотентности, списание остатка, позиция корзины, резерв, сохранённый ответ и фиксация.
+Поэтому пропускная способность отражает время, на которое блокируется строка популярного товара.
+Проверяет, что продано ровно столько единиц, сколько было на складе (нет перепродажи),
+и что пропускная способность не ниже --min-throughput попыток в секунду.
+
+Запуск (только на отдельной тестовой базе с применёнными миграциями):
+    python -m benchmarks.bench_stock_reservation --clients 50 --stock 1000 --attempts 40 --min-throughput 200
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.models import User
+from app.cart.models import CartItem
+from app.cart.schemas import CartItemCreate, CartItemOut
+from app.core.config import settings
+from app.core.idempotency import claim_idempotency_key, idempotency_fingerprint, save_idempotent_response
+from app.core.models import IdempotencyKey
+from app.products.models import Product, StockReservation
+from app.products.stock import add_reservation, take_stock
+
+
+async def add_to_cart(db: AsyncSession, user_id: int, product_id: int) -> bool:
+    """Повторяет транзакцию маршрута add_to_cart. Возвращает True, если товар зарезервирован."""
+    item_data = CartItemCreate(product_id=product_id, quantity=1)
+    key = uuid.uuid4().hex
+    fingerprint = idempotency_fingerprint("POST /cart/cart", item_data.model_dump_json())
+    await claim_idempotency_key(db, user_id, key, fingerprint)
+
+    if not await take_stock(db, product_id, item_data.quantity):
+        await db.rollback()
+        return False
+
+    cart_item = CartItem(product_id=product_id, user_id=user_id, quantity=item_data.quantity)
+    db.add(cart_item)
+    await db.flush()
+    add_reservation(db, cart_item)
+    body = CartItemOut.model_validate(cart_item).model_dump_json().encode()
+    await save_idempotent_response(db, user_id, key, 200, body)
+    await db.commit()
+    return True
+
+
+async def client(session_factory, user_id: int, product_id: int, attempts: int, stats: dict) -> None:
+    for _ in range(attempts):
+        async with session_factory() as db:
+            if await add_to_cart(db, user_id, product_id):
+                stats["sold"] += 1
+            else:
+                stats["rejected"] += 1
+
+
+async def main(clients: int, stock: int, attempts: int, min_throughput: float) -> None:
+    engine = create_async_engine(settings.DATABASE_URL, pool_size=clients, max_overflow=0)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        user = User(
+            full_name="benchmark",
+            email=f"bench-{uuid.uuid4().hex}@example.com",
+            phone=f"+7{uuid.uuid4().int % 10 ** 10:010d}",
+            hashed_password="-",
+        )
+        product = Product(name="benchmark", price=1, stock=stock, is_active=True)
+        db.add_all([user, product])
+        await db.commit()
+        user_id, product_id = user.id, product.id
+
+    stats = {"sold": 0, "rejected": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(client(session_factory, user_id, product_id, attempts, stats) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    async with session_factory() as db:
+        product = await db.get(Product, product_id)
+        left = product.stock
+        await db.execute(delete(StockReservation).where(StockReservation.product_id == product_id))
+        await db.execute(delete(CartItem).where(CartItem.product_id == product_id))
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.user_id == user_id))
+        await db.execute(delete(Product).where(Product.id == product_id))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+    await engine.dispose()
+
+    total = clients * attempts
+    throughput = total / elapsed
+    print(f"клиентов: {clients}, попыток: {total}, остаток на старте: {stock}")
+    print(f"продано: {stats['sold']}, отказов: {stats['rejected']}, остаток: {left}")
+    print(f"время: {elapsed:.2f} с, {throughput:.0f} попыток/с")
+    assert stats["sold"] == min(stock, total), "Продано больше или меньше, чем было на складе"
+    assert left == stock - stats["sold"], "Остаток на складе не сходится с продажами"
+    assert throughput >= min_throughput, f"Пропускная способность ниже {min_throughput:.0f} попыток/с"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--stock", type=int, default=1000)
+    parser.add_argument("--attempts", type=int, default=40)
+    parser.add_argument("--min-throughput", type=float, default=200, help="Минимально допустимое число попыток в секунду")
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.stock, args.attempts, args.min_throughput))
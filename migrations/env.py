@@ -4,9 +4,11 @@ from sqlalchemy import pool
 from sqlalchemy.ext.asyncio import AsyncEngine
 from alembic import context
 from app.db.base import Base
-from app.auth.models import User
-from app.products.models import Product
+from app.auth.models import User, RefreshToken
+from app.products.models import Product, StockReservation, ProductCooccurrence
 from app.cart.models import CartItem
+from app.core.models import IdempotencyKey
+from app.pricing.models import Promotion
 from app.core.config import settings
 
 # Конфигурация логгера Alembic
@@ -0,0 +1,53 @@
+"""Stock and reservations
+
+Revision ID: 3f1c9a7d2b64
+Revises: 5c407263e7f2
+Create Date: 2026-10-19 10:12:31.418204
+
+Порядок выкатки: существующие товары получают stock = 0, и добавление их в корзину
+возвращает 409, пока остаток не задан. Сразу после миграции заполните остатки из учётной
+системы через POST /products/products/{id}/stock (или PATCH массово), а до этого
+не открывайте приложению трафик. Значение по умолчанию не подбирается автоматически,
+чтобы не продать товар, которого нет на складе.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = '5c407263e7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Остатки намеренно не заполняются: см. порядок выкатки в описании миграции
+    op.add_column('products', sa.Column('stock', sa.Integer(), server_default='0', nullable=False))
+    op.create_check_constraint('ck_products_stock_non_negative', 'products', 'stock >= 0')
+    op.create_table('stock_reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('cart_item_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stock_reservations_id'), 'stock_reservations', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_reservations_cart_item_id'), 'stock_reservations', ['cart_item_id'], unique=False)
+    op.create_index(op.f('ix_stock_reservations_expires_at'), 'stock_reservations', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_stock_reservations_expires_at'), table_name='stock_reservations')
+    op.drop_index(op.f('ix_stock_reservations_cart_item_id'), table_name='stock_reservations')
+    op.drop_index(op.f('ix_stock_reservations_id'), table_name='stock_reservations')
+    op.drop_table('stock_reservations')
+    op.drop_constraint('ck_products_stock_non_negative', 'products', type_='check')
+    op.drop_column('products', 'stock')
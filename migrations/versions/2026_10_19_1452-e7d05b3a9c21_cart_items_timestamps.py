@@ -0,0 +1,33 @@
+"""Cart items timestamps
+
+Revision ID: e7d05b3a9c21
+Revises: c4a9e1b7d352
+Create Date: 2026-10-19 14:52:10.648273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7d05b3a9c21'
+down_revision: Union[str, None] = 'c4a9e1b7d352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Существующие позиции получают текущее время и начинают отсчёт срока жизни с момента миграции
+    op.add_column('cart_items', sa.Column('created_at', sa.DateTime(), nullable=False,
+                                          server_default=sa.text("timezone('utc', now())")))
+    op.add_column('cart_items', sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                          server_default=sa.text("timezone('utc', now())")))
+    op.create_index(op.f('ix_cart_items_updated_at'), 'cart_items', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_cart_items_updated_at'), table_name='cart_items')
+    op.drop_column('cart_items', 'updated_at')
+    op.drop_column('cart_items', 'created_at')
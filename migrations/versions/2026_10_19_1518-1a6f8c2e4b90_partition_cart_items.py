@@ -0,0 +1,114 @@
+"""Partition cart items by month
+
+Выполняется, только если CART_ITEMS_PARTITIONED=true. Таблица cart_items пересоздаётся
+как секционированная по created_at (RANGE, по месяцам) с секцией по умолчанию,
+данные переносятся в новую таблицу. Старые секции удаляет фоновая задача maintain_cart_items.
+Миграция переписывает таблицу целиком, поэтому её следует запускать в окно обслуживания.
+Флаг читается только в момент миграции: если включить его позже, миграция повторно
+не выполнится и таблица останется обычной. Фоновая задача определяет вид таблицы по каталогу
+базы, поэтому в этом случае она просто продолжает построчную очистку.
+
+Revision ID: 1a6f8c2e4b90
+Revises: e7d05b3a9c21
+Create Date: 2026-10-19 15:18:37.120954
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a6f8c2e4b90'
+down_revision: Union[str, None] = 'e7d05b3a9c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def month_start(moment: datetime, shift: int = 0) -> datetime:
+    month = moment.year * 12 + moment.month - 1 + shift
+    return datetime(month // 12, month % 12 + 1, 1)
+
+
+def is_partitioned() -> bool:
+    bind = op.get_bind()
+    relkind = bind.execute(sa.text("SELECT relkind FROM pg_class WHERE relname = 'cart_items'")).scalar()
+    return relkind == 'p'
+
+
+def upgrade() -> None:
+    if not settings.CART_ITEMS_PARTITIONED or is_partitioned():
+        return
+
+    op.execute("ALTER TABLE cart_items RENAME TO cart_items_unpartitioned")
+    op.execute("ALTER TABLE cart_items_unpartitioned RENAME CONSTRAINT cart_items_pkey TO cart_items_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_cart_items_id RENAME TO ix_cart_items_unpartitioned_id")
+    op.execute("ALTER INDEX ix_cart_items_updated_at RENAME TO ix_cart_items_unpartitioned_updated_at")
+
+    # Ключ секционирования обязан входить в первичный ключ
+    op.execute("""
+        CREATE TABLE cart_items (
+            id integer NOT NULL DEFAULT nextval('cart_items_id_seq'),
+            product_id integer NOT NULL REFERENCES products (id),
+            user_id integer NOT NULL REFERENCES users (id),
+            quantity integer NOT NULL,
+            created_at timestamp NOT NULL DEFAULT timezone('utc', now()),
+            updated_at timestamp NOT NULL DEFAULT timezone('utc', now()),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.create_index(op.f('ix_cart_items_id'), 'cart_items', ['id'], unique=False)
+    op.create_index(op.f('ix_cart_items_updated_at'), 'cart_items', ['updated_at'], unique=False)
+    op.execute("CREATE TABLE cart_items_default PARTITION OF cart_items DEFAULT")
+
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM cart_items_unpartitioned")).scalar()
+    now = datetime.utcnow()
+    start = month_start(oldest or now)
+    while start < month_start(now, settings.CART_PARTITIONS_AHEAD + 1):
+        end = month_start(start, 1)
+        op.execute(
+            f"CREATE TABLE cart_items_p{start:%Y%m} PARTITION OF cart_items "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+        start = end
+
+    op.execute("""
+        INSERT INTO cart_items (id, product_id, user_id, quantity, created_at, updated_at)
+        SELECT id, product_id, user_id, quantity, created_at, updated_at FROM cart_items_unpartitioned
+    """)
+    op.execute("ALTER SEQUENCE cart_items_id_seq OWNED BY cart_items.id")
+    op.execute("DROP TABLE cart_items_unpartitioned")
+
+
+def downgrade() -> None:
+    if not is_partitioned():
+        return
+
+    op.execute("ALTER TABLE cart_items RENAME TO cart_items_partitioned")
+    op.execute("ALTER TABLE cart_items_partitioned RENAME CONSTRAINT cart_items_pkey TO cart_items_partitioned_pkey")
+    op.execute("ALTER INDEX ix_cart_items_id RENAME TO ix_cart_items_partitioned_id")
+    op.execute("ALTER INDEX ix_cart_items_updated_at RENAME TO ix_cart_items_partitioned_updated_at")
+
+    op.execute("""
+        CREATE TABLE cart_items (
+            id integer NOT NULL DEFAULT nextval('cart_items_id_seq'),
+            product_id integer NOT NULL REFERENCES products (id),
+            user_id integer NOT NULL REFERENCES users (id),
+            quantity integer NOT NULL,
+            created_at timestamp NOT NULL DEFAULT timezone('utc', now()),
+            updated_at timestamp NOT NULL DEFAULT timezone('utc', now()),
+            PRIMARY KEY (id)
+        )
+    """)
+    op.create_index(op.f('ix_cart_items_id'), 'cart_items', ['id'], unique=False)
+    op.create_index(op.f('ix_cart_items_updated_at'), 'cart_items', ['updated_at'], unique=False)
+    op.execute("""
+        INSERT INTO cart_items (id, product_id, user_id, quantity, created_at, updated_at)
+        SELECT id, product_id, user_id, quantity, created_at, updated_at FROM cart_items_partitioned
+    """)
+    op.execute("ALTER SEQUENCE cart_items_id_seq OWNED BY cart_items.id")
+    op.execute("DROP TABLE cart_items_partitioned")
@@ -0,0 +1,35 @@
+"""Product cooccurrence
+
+Revision ID: 5d8e2a9f7c13
+Revises: 1a6f8c2e4b90
+Create Date: 2026-10-19 16:34:12.518904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e2a9f7c13'
+down_revision: Union[str, None] = '1a6f8c2e4b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('product_cooccurrence',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('related_product_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('product_id', 'related_product_id')
+    )
+    op.create_index('ix_product_cooccurrence_top', 'product_cooccurrence', ['product_id', 'score'], unique=False)
+    op.create_index(op.f('ix_cart_items_user_id'), 'cart_items', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_cart_items_user_id'), table_name='cart_items')
+    op.drop_index('ix_product_cooccurrence_top', table_name='product_cooccurrence')
+    op.drop_table('product_cooccurrence')
@@ -1,6 +1,11 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.auth.models import User
+from app.auth.routes import MAX_USER_IDS
 from app.main import app
+from tests.utils import register_and_login, run_db
 
 client = TestClient(app)
 
@@ -29,3 +34,72 @@ def test_login():
     )
     assert response.status_code == 200
     assert "access_token" in response.json()
+
+
+# Тест обновления токена доступа по refresh-токену
+def test_refresh_token():
+    login_response = client.post(
+        "/auth/login",
+        data={"username": "test@example.com", "password": "Password123!"}
+    )
+    refresh_token = login_response.json()["refresh_token"]
+
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    assert "access_token" in response.json()
+    new_refresh_token = response.json()["refresh_token"]
+    assert new_refresh_token != refresh_token
+
+    # Повторное использование погашенного токена отзывает всю цепочку
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+    response = client.post("/auth/refresh", json={"refresh_token": new_refresh_token})
+    assert response.status_code == 401
+
+
+# Тест пакетной выборки пользователей по ID и keyset-пагинации
+def test_get_users_batch_and_keyset():
+    admin_id, token = register_and_login(client, is_admin=True)
+    first_id, _ = register_and_login(client)
+    inactive_id, _ = register_and_login(client)
+    last_id, _ = register_and_login(client)
+
+    async def deactivate(db):
+        await db.execute(update(User).where(User.id == inactive_id).values(is_active=False))
+        await db.commit()
+
+    run_db(deactivate)
+
+    def get_users(**params):
+        response = client.get("/auth/users", params={"token": token, **params})
+        assert response.status_code == 200
+        page = response.json()
+        return [user["id"] for user in page["items"]], page["next_after_id"]
+
+    # Пакетная выборка: фильтры применяются, курсора нет
+    ids = [admin_id, first_id, inactive_id, last_id]
+    assert get_users(ids=ids) == (ids, None)
+    assert get_users(ids=ids, is_active=True) == ([admin_id, first_id, last_id], None)
+    assert get_users(ids=ids, is_admin=True) == ([admin_id], None)
+
+    # Keyset: при limit + 1 строках курсор равен ID последнего пользователя страницы
+    assert get_users(after_id=first_id - 1, limit=2) == ([first_id, inactive_id], inactive_id)
+    assert get_users(after_id=inactive_id, limit=2) == ([last_id], None)
+    # Фильтры применяются и при постраничной выборке
+    assert get_users(after_id=first_id - 1, limit=1, is_active=True) == ([first_id], first_id)
+    assert get_users(after_id=first_id, limit=1, is_active=True) == ([last_id], None)
+    assert get_users(after_id=admin_id - 1, limit=1, is_admin=True) == ([admin_id], None)
+
+    response = client.get("/auth/users", params={"token": token, "ids": list(range(1, MAX_USER_IDS + 2))})
+    assert response.status_code == 400
+
+
+# Файл импорта не в UTF-8 отклоняется с кодом 400, а не падает с 500
+def test_import_users_invalid_utf8():
+    _, token = register_and_login(client, is_admin=True)
+    response = client.post(
+        "/auth/users/import",
+        params={"token": token},
+        files={"file": ("users.csv", b"full_name,email,phone,password\n\xff\xfe,a@example.com,+79990000000,x\n")}
+    )
+    assert response.status_code == 400
@@ -1,6 +1,9 @@
+import uuid
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from tests.utils import create_stocked_product, register_and_login
 
 client = TestClient(app)
 
@@ -36,3 +39,44 @@ def test_get_cart():
     )
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+
+# Тест получения корзины с выборкой отдельных полей
+def test_get_cart_with_fields():
+    login_response = client.post(
+        "/auth/login",
+        data={"username": "test@example.com", "password": "Password123!"}
+    )
+    token = login_response.json()["access_token"]
+
+    # Зависимость авторизации принимает токен параметром запроса token
+    response = client.get("/cart/cart", params={"token": token, "fields": "product_id"})
+    assert response.status_code == 200
+    for item in response.json():
+        assert set(item) == {"id", "product_id"}
+
+    response = client.get("/cart/cart", params={"token": token, "fields": "user_id"})
+    assert response.status_code == 400
+
+
+# Тест повторного добавления товара с тем же ключом идемпотентности
+def test_add_to_cart_idempotency_key():
+    _, token = register_and_login(client)
+    product_id = create_stocked_product(stock=10)
+    headers = {"Idempotency-Key": f"test-add-to-cart-{uuid.uuid4()}"}
+    params = {"token": token}
+
+    first = client.post("/cart/cart", params=params, headers=headers, json={"product_id": product_id, "quantity": 1})
+    assert first.status_code == 200
+    second = client.post("/cart/cart", params=params, headers=headers, json={"product_id": product_id, "quantity": 1})
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+
+    # Повтор не добавил вторую позицию
+    cart = client.get("/cart/cart", params=params).json()
+    assert [item["product_id"] for item in cart].count(product_id) == 1
+
+    # Тот же ключ с другим телом запроса отклоняется
+    response = client.post("/cart/cart", params=params, headers=headers, json={"product_id": product_id, "quantity": 5})
+    assert response.status_code == 422
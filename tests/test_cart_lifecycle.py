@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.cart import lifecycle
+from app.cart.lifecycle import cart_cutoff, drop_expired_cart_partitions, month_start, partition_expired
+from app.core.config import settings
+
+NOW = datetime(2026, 3, 15, 12, 0)
+
+
+class FrozenDateTime(datetime):
+    @classmethod
+    def utcnow(cls):
+        return NOW
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(lifecycle, "datetime", FrozenDateTime)
+    monkeypatch.setattr(settings, "CART_TTL_DAYS", 30)
+
+
+@pytest.mark.parametrize("moment, shift, expected", [
+    (datetime(2026, 3, 15, 12, 30), 0, datetime(2026, 3, 1)),
+    (datetime(2026, 12, 5), 1, datetime(2027, 1, 1)),
+    (datetime(2026, 11, 30), 3, datetime(2027, 2, 1)),
+    (datetime(2026, 1, 10), -1, datetime(2025, 12, 1)),
+    (datetime(2026, 3, 1), -14, datetime(2025, 1, 1)),
+    (datetime(2026, 3, 1), 24, datetime(2028, 3, 1)),
+])
+def test_month_start(moment, shift, expected):
+    assert month_start(moment, shift) == expected
+
+
+# Брошенными считаются позиции, не изменявшиеся дольше CART_TTL_DAYS
+def test_cart_cutoff(frozen_clock):
+    assert cart_cutoff() == datetime(2026, 2, 13, 12, 0)
+
+
+# Секция удаляется, только когда весь её месяц старше cutoff
+@pytest.mark.parametrize("name, expired", [
+    ("cart_items_p202512", True),
+    ("cart_items_p202601", True),
+    ("cart_items_p202602", False),  # Февраль заканчивается 1 марта — позже cutoff 13 февраля
+    ("cart_items_p202603", False),
+])
+def test_partition_expired(name, expired):
+    assert partition_expired(name, datetime(2026, 2, 13, 12, 0)) is expired
+
+
+class RecordingSession:
+    """Сеанс-заглушка: запоминает выполненные запросы и сообщает, есть ли в секции свежие позиции."""
+
+    def __init__(self, fresh: set):
+        self.fresh = fresh
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.statements.append(sql)
+        fresh = any(f"FROM {name} " in sql for name in self.fresh)
+        return type("Result", (), {"scalar": lambda result: fresh})()
+
+    async def commit(self):
+        self.statements.append("COMMIT")
+
+    async def rollback(self):
+        self.statements.append("ROLLBACK")
+
+
+# Удаляются только устаревшие секции без свежих позиций; проверка идёт под блокировкой
+def test_drop_expired_cart_partitions(frozen_clock, monkeypatch):
+    async def partitions(db):
+        return ["cart_items_p202512", "cart_items_p202601", "cart_items_p202602"]
+
+    monkeypatch.setattr(lifecycle, "list_cart_partitions", partitions)
+    db = RecordingSession(fresh={"cart_items_p202601"})
+    dropped = asyncio.run(drop_expired_cart_partitions(db))
+
+    assert dropped == ["cart_items_p202512"]
+    assert not any("cart_items_p202602" in sql for sql in db.statements)
+    lock = db.statements.index("LOCK TABLE ONLY cart_items, cart_items_p202512 IN ACCESS EXCLUSIVE MODE")
+    check = next(i for i, sql in enumerate(db.statements) if sql.startswith("SELECT EXISTS (SELECT 1 FROM cart_items_p202512"))
+    drop = db.statements.index("DROP TABLE cart_items_p202512")
+    assert lock < check < drop
+    assert "DROP TABLE cart_items_p202601" not in db.statements
@@ -0,0 +1,113 @@
+import io
+
+import pytest
+
+from app.auth.importer import (
+    MAX_REPORTED_ERRORS,
+    ImportReport,
+    apply_rejections,
+    read_records,
+    validate_record,
+    validated_batches,
+)
+
+BCRYPT_HASH = "$2b$12$" + "a" * 53
+
+
+def record(**fields):
+    data = {"full_name": "Иван Иванов", "email": "ivan@example.com", "phone": "+79990000000", "password": "Secret1!"}
+    data.update(fields)
+    return data
+
+
+# CSV читается с заголовком, номер строки соответствует строке файла
+def test_read_records_csv():
+    stream = io.StringIO("full_name,email,phone,password\nИван,ivan@example.com,+79990000000,Secret1!\n")
+    records = list(read_records(stream, "csv"))
+    assert records == [(2, {"full_name": "Иван", "email": "ivan@example.com",
+                            "phone": "+79990000000", "password": "Secret1!"})]
+
+
+# В NDJSON пустые строки пропускаются, а неразобранные отдаются как None
+def test_read_records_ndjson():
+    stream = io.StringIO('{"email": "a@example.com"}\n\nnot json\n')
+    assert list(read_records(stream, "ndjson")) == [(1, {"email": "a@example.com"}), (3, None)]
+
+
+# Корректная запись нормализуется, пароль в открытом виде передаётся на хэширование
+def test_validate_record_plain_password():
+    assert validate_record(record(full_name="  Иван  ")) == (
+        "Иван", "ivan@example.com", "+79990000000", "", "Secret1!"
+    )
+
+
+# Готовый bcrypt-хэш переносится как есть, пароль при этом не хэшируется
+def test_validate_record_bcrypt_hash():
+    fields = validate_record(record(hashed_password=BCRYPT_HASH))
+    assert fields[3:] == (BCRYPT_HASH, "")
+
+
+@pytest.mark.parametrize("data", [
+    None,
+    record(full_name=""),
+    record(email="not-an-email"),
+    record(phone="89990000000"),
+    record(password="", hashed_password="plain-text"),
+    record(password=""),
+    record(phone=79990000000),
+    record(full_name=["Иван"]),
+    record(email={"address": "ivan@example.com"}),
+    record(password=12345678),
+    record(password=None, hashed_password=True),
+])
+def test_validate_record_rejects(data):
+    with pytest.raises(ValueError):
+        validate_record(data)
+
+
+# Поле не строкой отклоняет только свою строку, а не весь импорт
+def test_validated_batches_rejects_non_string_fields():
+    stream = io.StringIO('{"full_name": "Иван", "email": "ivan@example.com", "phone": 79990000000, '
+                         '"password": "Secret1!"}\n')
+    report = ImportReport()
+    assert list(validated_batches(stream, "ndjson", report)) == []
+    assert report.errors == [{"line": 1, "reason": "Поле phone должно быть строкой"}]
+
+
+# Файл не в UTF-8 прерывает чтение ошибкой декодирования, которую маршрут превращает в 400
+def test_read_records_invalid_utf8():
+    stream = io.TextIOWrapper(io.BytesIO(b"full_name,email\n\xff\xfe,a@example.com\n"), encoding="utf-8", newline="")
+    with pytest.raises(UnicodeDecodeError):
+        list(read_records(stream, "csv"))
+
+
+# Некорректные строки попадают в отчёт, корректные — в пачки
+def test_validated_batches():
+    stream = io.StringIO('{"full_name": "Иван", "email": "ivan@example.com", "phone": "+79990000000", '
+                         '"password": "Secret1!"}\n{"email": "bad"}\n')
+    report = ImportReport()
+    batches = list(validated_batches(stream, "ndjson", report))
+    assert [[row[:3] for row in batch] for batch in batches] == [[(1, "Иван", "ivan@example.com")]]
+    assert report.rejected == 1
+    assert report.errors[0]["line"] == 2
+
+
+# Повторы в файле и уже существующие пользователи учитываются в отчёте по порядку строк
+def test_apply_rejections():
+    report = ImportReport()
+    report.reject(5, "Некорректный email")
+    apply_rejections(report, [(7, "exists"), (3, "duplicate")], staged=10)
+    assert report.inserted == 8
+    assert report.rejected == 3
+    assert [error["line"] for error in report.errors] == [3, 5, 7]
+    assert report.errors[0]["reason"] == "Email или телефон повторяется в файле"
+    assert report.errors[2]["reason"] == "Пользователь с таким email или телефоном уже существует"
+
+
+# Поимённо перечисляется не более MAX_REPORTED_ERRORS отклонённых записей
+def test_report_limits_listed_errors():
+    report = ImportReport()
+    for line in range(MAX_REPORTED_ERRORS + 5):
+        report.reject(line, "ошибка")
+    assert report.rejected == MAX_REPORTED_ERRORS + 5
+    assert len(report.errors) == MAX_REPORTED_ERRORS
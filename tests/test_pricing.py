@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+from app.pricing.engine import compile_rules
+from app.pricing.schemas import PromotionCreate
+
+
+def promotion(id, kind, value, product_id=None, quantity=None, threshold=None):
+    return SimpleNamespace(id=id, name=f"promo {id}", kind=kind, product_id=product_id,
+                           value=value, quantity=quantity, threshold=threshold)
+
+
+# Корзина без акций стоит сумму цен позиций
+def test_price_without_promotions():
+    price = compile_rules([]).price([(1, 100, 2), (2, 50, 1)])
+    assert (price.subtotal, price.discount, price.total) == (250, 0, 250)
+    assert price.promotions == {}
+
+
+# На товар применяется самая выгодная из его скидок, скидки не суммируются
+def test_best_product_discount_wins():
+    rules = compile_rules([
+        promotion(1, "percent", 10, product_id=1),
+        promotion(2, "fixed", 30, product_id=1),
+        promotion(3, "bundle", 200, product_id=1, quantity=3),
+    ])
+    # 3 × 100: процент — 30, фиксированная — 90, набор «3 за 200» — 100
+    assert rules.price([(1, 100, 3)]).promotions == {3: 100}
+    # 2 × 100: набор не собран, фиксированная 60 выгоднее процента 20
+    assert rules.price([(1, 100, 2)]).promotions == {2: 60}
+
+
+# Позиции одного товара складываются при подсчёте наборов
+def test_bundle_counts_all_lines_of_product():
+    rules = compile_rules([promotion(1, "bundle", 200, product_id=1, quantity=3)])
+    price = rules.price([(1, 100, 2), (1, 100, 5)])
+    assert price.subtotal == 700
+    assert price.discount == 200  # Два набора по 3 единицы, седьмая по полной цене
+
+
+# Фиксированная скидка не делает цену отрицательной
+def test_fixed_discount_capped_by_price():
+    price = compile_rules([promotion(1, "fixed", 500, product_id=1)]).price([(1, 100, 2)])
+    assert price.total == 0
+
+
+# Пороговая скидка выбирается по сумме после скидок на товары
+def test_tiered_discount_by_threshold():
+    rules = compile_rules([
+        promotion(1, "tiered", 5, threshold=1000),
+        promotion(2, "tiered", 10, threshold=5000),
+        promotion(3, "percent", 50, product_id=1),
+    ])
+    assert rules.price([(2, 999, 1)]).discount == 0
+    assert rules.price([(2, 1000, 1)]).promotions == {1: 50}
+    assert rules.price([(2, 6000, 1)]).promotions == {2: 600}
+    # 6000 со скидкой 50% на товар — 3000, порог 5000 не достигнут
+    assert rules.price([(1, 6000, 1)]).promotions == {3: 3000, 1: 150}
+
+
+# Обязательные поля акции зависят от её вида
+def test_promotion_validation():
+    PromotionCreate(name="скидка", kind="tiered", value=10, threshold=1000)
+    with pytest.raises(ValidationError):
+        PromotionCreate(name="скидка", kind="percent", value=10)
+    with pytest.raises(ValidationError):
+        PromotionCreate(name="скидка", kind="bundle", value=200, product_id=1)
+    with pytest.raises(ValidationError):
+        PromotionCreate(name="скидка", kind="percent", value=150, product_id=1)
+    with pytest.raises(ValidationError):
+        PromotionCreate(name="скидка", kind="tiered", value=10, threshold=1000, product_id=1)
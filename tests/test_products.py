@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app.products.models import Product
+from tests.utils import create_stocked_product, register_and_login, run_db
+
+client = TestClient(app)
+
+
+# Тест рекомендаций «часто покупают вместе» для товара из корзины
+def test_related_products():
+    response = client.get("/products/products/1/related?limit=5")
+    assert response.status_code == 200
+    items = response.json()
+    assert len(items) <= 5
+    scores = [item["score"] for item in items]
+    assert scores == sorted(scores, reverse=True)
+    assert all(item["id"] != 1 for item in items)
+
+    response = client.get("/products/products/1/related?limit=500")
+    assert response.status_code == 422
+
+
+# Тест массового обновления товаров
+def test_bulk_update_products():
+    _, token = register_and_login(client, is_admin=True)
+    first = create_stocked_product(stock=1, name="bulk first", price=100)
+    second = create_stocked_product(stock=1, name="bulk second", price=200)
+    unknown = 2 ** 31 - 1
+
+    response = client.patch(
+        "/products/products",
+        params={"token": token},
+        json=[
+            {"id": first, "price": 150},
+            {"id": second, "name": "bulk renamed"},
+            {"id": unknown, "price": 1},
+            {"id": first, "price": 175},  # Повтор ID: побеждает последнее изменение
+        ]
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "updated": 2,
+        "not_found": 1,
+        "results": [
+            {"id": first, "status": "updated"},
+            {"id": second, "status": "updated"},
+            {"id": unknown, "status": "not_found"},
+        ],
+    }
+
+    async def load(db):
+        stmt = select(Product.id, Product.name, Product.price, Product.updated_at).where(Product.id.in_([first, second]))
+        return {row.id: row for row in (await db.execute(stmt)).all()}
+
+    products = run_db(load)
+    assert (products[first].name, products[first].price) == ("bulk first", 175)
+    assert (products[second].name, products[second].price) == ("bulk renamed", 200)
+    assert products[first].updated_at == products[second].updated_at
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.singleflight import SingleFlight
+
+
+# Одновременные вызовы с одним ключом выполняют функцию один раз
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_result():
+    flight = SingleFlight(timeout=1)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return b"[]"
+
+    results = await asyncio.gather(*(flight.do("products", load) for _ in range(10)))
+    assert results == [b"[]"] * 10
+    assert calls == 1
+
+    # После завершения вызова результат не кэшируется
+    await flight.do("products", load)
+    assert calls == 2
+
+
+# Исключение первого вызова получают все ожидающие
+@pytest.mark.asyncio
+async def test_error_is_propagated():
+    flight = SingleFlight(timeout=1)
+
+    async def load():
+        await asyncio.sleep(0.05)
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+
+    results = await asyncio.gather(*(flight.do(1, load) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, HTTPException) and result.status_code == 404 for result in results)
+
+
+# Ожидающий запрос получает 504, если первый выполняется дольше таймаута
+@pytest.mark.asyncio
+async def test_waiter_timeout():
+    flight = SingleFlight(timeout=0.01)
+
+    async def load():
+        await asyncio.sleep(0.1)
+        return b"{}"
+
+    leader = asyncio.create_task(flight.do("slow", load))
+    await asyncio.sleep(0)
+    with pytest.raises(HTTPException) as error:
+        await flight.do("slow", load)
+    assert error.value.status_code == 504
+    assert await leader == b"{}"
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+
+from app.cart.models import CartItem
+from app.main import app
+from app.products.models import Product, StockReservation
+from app.products.stock import add_reservation, release_reservation, sweep_expired_reservations, take_stock
+from tests.utils import create_stocked_product, register_and_login, run_db
+
+client = TestClient(app)
+
+
+async def current_stock(db, product_id: int) -> int:
+    return (await db.execute(select(Product.stock).where(Product.id == product_id))).scalar_one()
+
+
+async def reserve(db, user_id: int, product_id: int, quantity: int) -> int:
+    """Повторяет запись add_to_cart: списание остатка, позиция корзины и резерв."""
+    assert await take_stock(db, product_id, quantity)
+    cart_item = CartItem(product_id=product_id, user_id=user_id, quantity=quantity)
+    db.add(cart_item)
+    await db.flush()
+    add_reservation(db, cart_item)
+    await db.commit()
+    return cart_item.id
+
+
+# Снятие резерва возвращает товар на склад один раз, повторное снятие ничего не меняет
+def test_release_reservation_restocks_once():
+    user_id, _ = register_and_login(client)
+    product_id = create_stocked_product(stock=5)
+
+    async def scenario(db):
+        cart_item_id = await reserve(db, user_id, product_id, 2)
+        stocks = [await current_stock(db, product_id)]
+        for _ in range(2):
+            await release_reservation(db, cart_item_id)
+            await db.commit()
+            stocks.append(await current_stock(db, product_id))
+        return stocks
+
+    assert run_db(scenario) == [3, 5, 5]
+
+
+# Нельзя зарезервировать больше, чем есть на складе
+def test_take_stock_rejects_oversell():
+    product_id = create_stocked_product(stock=1)
+
+    async def scenario(db):
+        taken = [await take_stock(db, product_id, 1), await take_stock(db, product_id, 1)]
+        await db.commit()
+        return taken, await current_stock(db, product_id)
+
+    assert run_db(scenario) == ([True, False], 0)
+
+
+# Фоновая задача освобождает просроченные резервы и возвращает товар на склад
+def test_sweep_expired_reservations():
+    user_id, _ = register_and_login(client)
+    product_id = create_stocked_product(stock=4)
+
+    async def scenario(db):
+        cart_item_id = await reserve(db, user_id, product_id, 3)
+        await db.execute(
+            update(StockReservation)
+            .where(StockReservation.cart_item_id == cart_item_id)
+            .values(expires_at=datetime.utcnow() - timedelta(minutes=1))
+        )
+        await db.commit()
+        released = await sweep_expired_reservations(db)
+        left = (await db.execute(
+            select(StockReservation.id).where(StockReservation.cart_item_id == cart_item_id)
+        )).first()
+        return released, left, await current_stock(db, product_id)
+
+    released, left, stock = run_db(scenario)
+    assert released >= 1
+    assert left is None
+    assert stock == 4
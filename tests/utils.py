@@ -0,0 +1,68 @@
+import asyncio
+import random
+import uuid
+from typing import Awaitable, Callable, Tuple, TypeVar
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.auth.models import User
+from app.core.config import settings
+from app.products.models import Product
+
+T = TypeVar("T")
+
+
+def run_db(job: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """Выполняет асинхронную функцию с отдельным сеансом базы данных вне цикла событий приложения."""
+    async def run() -> T:
+        engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with session_factory() as db:
+                return await job(db)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def register_and_login(client: TestClient, is_admin: bool = False) -> Tuple[int, str]:
+    """Регистрирует нового пользователя и возвращает его ID и токен доступа."""
+    email = f"test-{uuid.uuid4().hex}@example.com"
+    response = client.post(
+        "/auth/register",
+        json={
+            "full_name": "Test User",
+            "email": email,
+            "phone": f"+7{random.randint(0, 10 ** 10 - 1):010d}",
+            "password": "Password123!",
+            "password_confirm": "Password123!"
+        }
+    )
+    assert response.status_code == 200
+
+    async def find_user(db: AsyncSession) -> int:
+        user_id = (await db.execute(select(User.id).where(User.email == email))).scalar_one()
+        if is_admin:
+            await db.execute(update(User).where(User.id == user_id).values(is_admin=True))
+            await db.commit()
+        return user_id
+
+    user_id = run_db(find_user)
+    response = client.post("/auth/login", data={"username": email, "password": "Password123!"})
+    return user_id, response.json()["access_token"]
+
+
+def create_stocked_product(stock: int, name: str = "test product", price: int = 100) -> int:
+    """Создаёт активный товар с заданным остатком напрямую в базе и возвращает его ID."""
+    async def create(db: AsyncSession) -> int:
+        stmt = insert(Product).values(name=name, price=price, stock=stock, is_active=True).returning(Product.id)
+        product_id = (await db.execute(stmt)).scalar_one()
+        await db.commit()
+        return product_id
+
+    return run_db(create)